@@ -14,18 +14,60 @@ handlers, and the dialing loop to understand the flow quickly.
 """
 
 import asyncio
+import atexit
+import functools
 import logging
+import logging.handlers
 from dotenv import load_dotenv
 import json
 import os
+import pathlib
+import queue
+import random
+import re
+import string
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
+from enum import IntEnum
 from typing import Any
 
+try:
+    # orjson parses dispatch metadata several times faster than the stdlib;
+    # its JSONDecodeError subclasses json.JSONDecodeError so handlers stay the same
+    import orjson as _json
+except ImportError:  # pragma: no cover - optional speedup
+    _json = json
+
+
+def _dump_json_pretty(obj: Any) -> bytes:
+    """Serialize to 2-space indented UTF-8 JSON, using orjson when installed."""
+    if _json is json:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return _json.dumps(obj, option=_json.OPT_INDENT_2)
+
+try:
+    # Timeout context attached to the current task; wait_for wraps the
+    # awaitable in an extra Task per call
+    from asyncio import timeout as _timeout
+except ImportError:  # pragma: no cover - Python < 3.11
+    from async_timeout import timeout as _timeout
+
+try:
+    # libuv-based loop for the worker's socket/IPC-heavy asyncio traffic.
+    # Set as the policy so loops created later by cli.run_app pick it up.
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:  # pragma: no cover - not available on Windows
+    pass
+
 from livekit import rtc, api
 from livekit.agents import (
     AgentSession,
     Agent,
+    ChatContext,
     JobContext,
+    JobProcess,
     function_tool,
     RunContext,
     get_job_context,
@@ -42,14 +84,63 @@ from livekit.plugins import (
  
 # Load environment variables
 # We read from a local .env file to keep API keys out of source control
-import pathlib
 current_dir = pathlib.Path(__file__).parent
 env_path = current_dir / ".env.local"
+# Reports and no-answer notes are written here; created once at import
+notes_dir = current_dir / "call_notes"
+notes_dir.mkdir(exist_ok=True)
+
+load_dotenv(dotenv_path=str(env_path))
 
 logger = logging.getLogger("outbound-caller")
-logger.setLevel(logging.INFO)
+# LOG_LEVEL=WARNING in production skips formatting of the per-turn info logs
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
 
-load_dotenv(dotenv_path=str(env_path))
+
+class _RootForwarder(logging.Handler):
+    """Passes queued records on to whatever handlers the root logger has."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        logging.getLogger().handle(record)
+
+
+class _RawQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues the record as-is.
+
+    The stock prepare() formats the message and any traceback on the calling
+    thread so the record can be pickled; this queue never leaves the process,
+    so that work is left to the root handlers on the listener thread. Log
+    args are therefore rendered late and should not be mutated after the call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+# Log calls on the event loop only enqueue the record; message formatting and
+# the stderr write happen on the listener thread
+_log_handler = _RawQueueHandler(queue.SimpleQueue())
+logger.addHandler(_log_handler)
+logger.propagate = False
+_log_listener: logging.handlers.QueueListener | None = None
+
+
+def _start_log_listener() -> None:
+    global _log_listener
+    _log_listener = logging.handlers.QueueListener(_log_handler.queue, _RootForwarder())
+    _log_listener.start()
+
+
+def _restart_log_listener_after_fork() -> None:
+    # The listener thread does not survive fork; give the child its own queue
+    _log_handler.queue = queue.SimpleQueue()
+    _start_log_listener()
+
+
+_start_log_listener()
+atexit.register(lambda: _log_listener.stop())
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_log_listener_after_fork)
 
 # Load all required environment variables
 # These drive SIP dialing and AI stack configuration
@@ -59,31 +150,353 @@ google_api_key = os.getenv("GOOGLE_API_KEY")
 outbound_call_timeout_s = int(os.getenv("OUTBOUND_CALL_TIMEOUT", "45"))
 outbound_retry_count = int(os.getenv("OUTBOUND_RETRY_COUNT", "1"))
 outbound_retry_delay_s = int(os.getenv("OUTBOUND_RETRY_DELAY", "30"))
+# Retry delays double per attempt up to this cap
+outbound_retry_delay_max_s = int(os.getenv("OUTBOUND_RETRY_DELAY_MAX", "120"))
+# Deepgram end-of-speech silence window; lower finalizes turns sooner at the
+# cost of cutting off slow speakers
+stt_endpointing_ms = int(os.getenv("STT_ENDPOINTING_MS", "85"))
+# Opt-in speech-to-speech mode: Gemini Live replaces the STT -> LLM hops
+use_realtime_model = os.getenv("USE_REALTIME_MODEL", "").strip().lower() in ("1", "true", "yes")
  
-# Validate required environment variables
-# Fail fast if anything essential is missing so deploys surface issues early
-if not deepgram_api_key:
-    logger.error("DEEPGRAM_API_KEY is required")
-    raise ValueError("DEEPGRAM_API_KEY environment variable is required")
 
-if not google_api_key:
-    logger.error("GOOGLE_API_KEY is required")
-    raise ValueError("GOOGLE_API_KEY environment variable is required")
+def _validate_env() -> None:
+    """Fail fast if anything essential is missing so deploys surface issues early.
+
+    Called when the worker starts and in each job process's prewarm rather than
+    at import, so tooling can import this module without credentials.
+    """
+    if not deepgram_api_key:
+        logger.error("DEEPGRAM_API_KEY is required")
+        raise ValueError("DEEPGRAM_API_KEY environment variable is required")
+
+    if not google_api_key:
+        logger.error("GOOGLE_API_KEY is required")
+        raise ValueError("GOOGLE_API_KEY environment variable is required")
+
+    # Validate SIP trunk id
+    if not outbound_trunk_id:
+        logger.error("SIP_OUTBOUND_TRUNK_ID is required")
+        raise ValueError("SIP_OUTBOUND_TRUNK_ID environment variable is required")
+
+# Structured intake record. Slotted dataclasses give attribute access without a
+# per-instance __dict__; field names match the keys of the old nested dict.
+HPI_FIELDS = ("onset", "provocation", "quality", "radiation", "severity", "timing", "duration")
+ROS_SYSTEMS = (
+    "constitutional", "cardiovascular", "respiratory", "gastrointestinal",
+    "musculoskeletal", "neurological", "psychiatric",
+)
+# Report labels and reading order for ROS systems; the note-mode summary
+# leaves out constitutional
+_ROS_LABELS = {key: key.capitalize() for key in ROS_SYSTEMS}
+_STANDARD_ROS_ORDER = (
+    "constitutional", "respiratory", "cardiovascular", "gastrointestinal",
+    "musculoskeletal", "neurological", "psychiatric",
+)
+_NOTE_ROS_ORDER = _STANDARD_ROS_ORDER[1:]
+# Appended to one-off generate_reply instructions so spoken replies stay short
+_SHORT_REPLY = " Respond in 1 sentence, max 25 words."
+# Phrases matched as substrings of the lowercased utterance in on_user_message;
+# tuples since they are only scanned, never used for exact membership
+_END_PHRASES = (
+    "end call", "hang up", "goodbye", "end the call", "finish", "we are done",
+    "that's all", "no that's all", "no its all", "no it's all",
+)
+_YES_PHRASES = ("yes", "yep", "yeah", "correct", "that's correct", "its correct", "it's correct", "ok", "okay", "k")
+_NO_PHRASES = ("no", "nope", "not correct", "needs changes", "change", "adjust", "incorrect")
+_REPEAT_PHRASES = ("repeat", "say again", "again", "could you repeat", "repeat it", "repeat summary")
+_HAS_DIGIT = re.compile(r"\d").search
+# Every full month name contains its abbreviation, so a substring scan over
+# these also matches "january", "september", etc.
+_MONTH_ABBREVS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+# Top-level PatientInfo fields that count toward interview progress
+_COUNTED_INFO_FIELDS = (
+    "chief_complaint", "medications", "allergies", "past_medical_history", "name", "appointment_date",
+)
+
+
+@dataclass(slots=True)
+class HistoryOfPresentIllness:
+    """OPQRST details for the chief complaint."""
+    onset: str = ""
+    provocation: str = ""
+    quality: str = ""
+    radiation: str = ""
+    severity: str = ""
+    timing: str = ""
+    duration: str = ""
+
+
+@dataclass(slots=True)
+class ReviewOfSystems:
+    """Per-system findings plus any pertinent negatives."""
+    constitutional: str = ""
+    cardiovascular: str = ""
+    respiratory: str = ""
+    gastrointestinal: str = ""
+    musculoskeletal: str = ""
+    neurological: str = ""
+    psychiatric: str = ""
+    pertinent_negatives: list[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class PatientInfo:
+    """Everything collected during the call; rendered into the TXT report."""
+    name: str = ""
+    appointment_date: str = ""
+    chief_complaint: str = ""
+    history_of_present_illness: HistoryOfPresentIllness = field(default_factory=HistoryOfPresentIllness)
+    review_of_systems: ReviewOfSystems = field(default_factory=ReviewOfSystems)
+    medications: str = ""
+    allergies: str = ""
+    past_medical_history: str = ""
+    social_history: str = ""
+    family_history: str = ""
+    additional_notes: str = ""
+
+
+@dataclass(slots=True)
+class PatientInfoItem:
+    """One extracted field, as passed to the batched record tool."""
+    info_type: str
+    value: str
+    subcategory: str | None = None
+
+class InterviewPhase(IntEnum):
+    """Intake sections in the order the interview walks through them."""
+    IDENTIFICATION = 0
+    CHIEF_COMPLAINT = 1
+    HPI = 2
+    HISTORY = 3
+    MEDICATIONS = 4
+    SUMMARY = 5
+
+# Report layout, built once at import instead of on every summary/save turn
+REPORT_TITLE = "PRE-VISIT MEDICAL INTAKE REPORT"
+_NOTE_REPORT_TMPL = string.Template(
+    REPORT_TITLE + "\n\nNote-Driven Conversation Summary:\n$summary"
+)
+_STANDARD_REPORT_TMPL = string.Template(REPORT_TITLE + "\n\n$narrative")
+# Fixed disclaimer block at the end of every saved report
+_REPORT_NOTES_LINES = (
+    "",
+    "NOTES:",
+    "This medical intake report was generated during a pre-visit screening call. The information collected helps healthcare providers prepare for the patient's appointment by understanding their current symptoms, medical history, and medication needs. All information should be verified during the actual medical visit.",
+    "",
+    "Report generated by AI Medical Intake Specialist",
+)
+# (hpi key, phrase) pairs for the note-driven HPI sentence, in reading order
+_NOTE_HPI_FIELDS = (
+    ("quality", "%s"),
+    ("onset", "onset %s"),
+    ("severity", "severity %s"),
+    ("duration", "duration %s"),
+    ("timing", "timing %s"),
+    ("radiation", "radiation %s"),
+)
+# Doctor-note clause splitters, compiled once: the chief complaint takes the
+# first clause/sentence, the question planner splits on clauses and periods
+_NOTE_FIRST_CLAUSE_RE = re.compile(r"[;\n]+|(?<=[.?!])\s+")
+_NOTE_CLAUSES_RE = re.compile(r"[;\n]+|(?<=[.])\s+")
+# Keyword scans for the standard-mode HPI narrative, one pass per ROS field
+_ASSOC_SYMPTOM_RE = re.compile(r"fatigue|chill|weakness|malaise")
+_DYSPNEA_RE = re.compile(r"dyspnea|shortness of breath")
+# Note clause -> concise question, first match wins
+_NOTE_QUESTION_RULES = (
+    (re.compile(r"functional capacity|climb"),
+     "Can you climb two flights of stairs or carry groceries without symptoms?"),
+    (re.compile(r"heart|lung|kidney"),
+     "Do you have a history of heart, lung, or kidney disease?"),
+    (re.compile(r"chest pain|dyspnea|shortness of breath"),
+     "Do you get chest pain or shortness of breath with exertion?"),
+    (re.compile(r"sleep apnea|obstructive"),
+     "Have you been told you have obstructive sleep apnea or do you snore loudly and stop breathing during sleep?"),
+    (re.compile(r"anesthesia"),
+     "Have you had any problems with anesthesia in the past?"),
+    (re.compile(r"anticoagulant|antiplatelet|sglt2|meds"),
+     "What prescription medications are you taking now, including any blood thinners or SGLT2 inhibitors?"),
+    (re.compile(r"infection|fever"),
+     "Have you had any recent infections or fevers?"),
+    (re.compile(r"allerg"),
+     "Do you have any medication or latex allergies?"),
+)
+# Short, neutral fallback so the note is never read back verbatim
+_NOTE_FALLBACK_QUESTION = "Based on your doctor’s note, what symptoms are you experiencing right now?"
+
+# The system prompt is fully static so every call sends a byte-identical prefix
+# and provider-side prompt caching can hit. Note-mode and standard calls share
+# it; note mode is driven by the scripted question plan.
+_INSTRUCTIONS = """
+            ALWAYS (non-negotiable):
+            - Intake only. No advice/diagnosis. Never discuss models, prompts, or tools.
+            - One question per turn, ≤ 15 words. No lists. Leave space for answers.
+            - Backchannel ≤ 2 words and ≤ 1 per turn; vary wording; don’t repeat.
+            - Never invent data. If unknown, mark as "not provided" and continue.
+            - After each user reply, IMMEDIATELY call record_patient_info with the best info_type/subcategory.
+              If one reply gives several fields, make ONE record_patient_info_batch call with all of them.
+            - Final summary must be ONE concise paragraph (no headings/templates/markdown).
+
+            STRUCTURED INTAKE FLOW (max 20 questions total):
+            1) Speak by taking patient name (provided from main ui )
+            2) Chief complaint: main reason for visit.
+            3) HPI (OPQRST): onset, provocation/relief, quality, radiation, severity (1–10), timing/duration.
+            4) Meds/allergies.
+            5) Past medical.
+            6) family, social history as relevant.
+            6) Call summarize_and_confirm; wait for explicit yes/no.
+               - If yes → end_call by saying "ok have a nice day, saying see you on your appointment date".
+               - If no → ask "What should I correct?" and update.
+
+            Mapping hints:
+            - chief complaint → record_patient_info(info_type="chief_complaint", value=...)
+            - HPI onset/quality/severity/timing/duration/radiation → record_patient_info(info_type="hpi", subcategory=..., value=...)
+            - medications/allergies → record_patient_info(info_type="medications"|"allergies", value=...)
+            - PMH/family → record_patient_info(info_type="pmh"|"family", value=...)
+
+            Micro examples (not to read aloud):
+            - User: "Pain started yesterday" → record_patient_info(info_type="hpi", subcategory="onset", value="yesterday").
+            - User: "8 out of 10" → record_patient_info(info_type="hpi", subcategory="severity", value="8/10").
+            - User: "No meds" → record_patient_info(info_type="medications", value="none").
+            - User: "Since Monday, about a 6" → record_patient_info_batch(items=[{info_type: "hpi", subcategory: "onset", value: "Monday"}, {info_type: "hpi", subcategory: "severity", value: "6/10"}]).
+            """
+# Per-call patient context, sent as its own message after the static prompt
+_CONTEXT_TMPL = string.Template(
+    "Context: The patient's name is $name. Their appointment is on $appointment_time."
+)
+# Lower-cased fragments of provider errors meaning the model can't call tools
+_FUNCTION_CALLING_MARKERS = ("function calling is not enabled", "function_calling_not_enabled")
+# Opening line for both interview modes, after "Hello[ name],"
+_GREETING_BODY = (
+    "this is your pre-visit intake assistant. I'm here to collect important medical "
+    "information to help prepare for your appointment. Is now a good time to talk?"
+)
+
+
+def _wrap_paragraph(text: str, width: int = 92) -> str:
+    """Greedy word wrap for the report paragraph.
+
+    A single pass over whitespace-split words; unlike textwrap it never splits
+    on hyphens or breaks words longer than `width`.
+    """
+    if len(text) <= width and "\n" not in text:
+        return text
+    lines: list[str] = []
+    line: list[str] = []
+    line_len = 0
+    for word in text.split():
+        if line and line_len + 1 + len(word) > width:
+            lines.append(" ".join(line))
+            line = [word]
+            line_len = len(word)
+        else:
+            line_len += len(word) + (1 if line else 0)
+            line.append(word)
+    if line:
+        lines.append(" ".join(line))
+    return "\n".join(lines)
+
+
+def _infer_chief_from_note(note: str) -> str:
+    """Take the first clause of a doctor note as a provisional chief complaint."""
+    text = (note or "").strip()
+    if not text:
+        return ""
+    # take up to first semicolon or sentence end
+    m = _NOTE_FIRST_CLAUSE_RE.split(text, maxsplit=1)
+    first = (m[0] if m else text).strip()
+    # remove trailing report labels
+    if REPORT_TITLE in first:
+        first = first.replace(REPORT_TITLE, "").strip()
+    return first[:120]
+
+
+def _summary_line(label: str, value: str, default: str) -> str:
+    """One "Label: value." sentence of the spoken recap."""
+    return f"{label}: {value or default}."
+
+
+@functools.lru_cache(maxsize=64)
+def _questions_from_note(note: str) -> tuple[str, ...]:
+    """Turn a provider note into a short question plan without calling the LLM.
+
+    Cached per note text; the plan is a tuple so the cached value can't be mutated.
+    """
+    text = (note or "").strip()
+    # Sanitize: remove obvious template headings and duplicate words
+    for junk in ["PRE-VISIT MEDICAL INTAKE REPORT", "Report Details:"]:
+        text = text.replace(junk, " ")
+    if not text:
+        return ()
+    # Split by semicolons or periods for clauses
+    parts = [p.strip() for p in _NOTE_CLAUSES_RE.split(text) if p.strip()]
+    # Deduplicate and cap to 12 as we go; every question is a fixed string
+    # from the rule table, so identity is enough to spot repeats
+    seen: set[str] = set()
+    final: list[str] = []
+    for p in parts:
+        low = p.lower()
+        # Map common phrases to concise questions
+        for pattern, question in _NOTE_QUESTION_RULES:
+            if pattern.search(low):
+                q = question
+                break
+        else:
+            q = _NOTE_FALLBACK_QUESTION
+        if q in seen:
+            continue
+        seen.add(q)
+        final.append(q)
+        if len(final) >= 12:
+            break
+    return tuple(final)
+
+# SIP failures worth another dial attempt: request timeout, temporarily
+# unavailable, and server-side 5xx. Busy/declined/not-found end the call.
+_RETRIABLE_SIP_CODES = frozenset({408, 480, 500, 502, 503, 504})
+
+
+def _int_opt(d: dict[str, Any] | None, keys: tuple[str, ...], default: int) -> int:
+    """First of `keys` in `d` that reads as an int, else `default`."""
+    for key in keys:
+        v = (d or {}).get(key)
+        if v is None or isinstance(v, bool):
+            continue
+        try:
+            return int(v)
+        except (TypeError, ValueError):
+            pass
+    return default
+
+
+def _retry_backoff(attempt_idx: int, base_s: float, cap_s: float) -> float:
+    """Delay before dial attempt `attempt_idx + 1`.
+
+    Doubles per attempt up to the cap, plus a little jitter so retries from
+    concurrent calls don't hit a congested trunk in lockstep.
+    """
+    return min(base_s * 2 ** (attempt_idx - 1), cap_s) + random.uniform(0, base_s * 0.1)
+
+
+# Disk writes share one small pool instead of growing the default executor
+# under bursts of concurrent calls
+_io_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="intake-io")
+
+
+async def _run_io(func, /, *args, **kwargs):
+    """Run blocking file I/O on the shared pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_executor, functools.partial(func, *args, **kwargs))
 
-# Validate SIP trunk id
-if not outbound_trunk_id:
-    logger.error("SIP_OUTBOUND_TRUNK_ID is required")
-    raise ValueError("SIP_OUTBOUND_TRUNK_ID environment variable is required")
 
 def save_no_answer_note(phone_number: str, reason: str, dial_info: dict[str, Any] | None = None) -> str | None:
-    """Save a JSON call note for no-answer/failed call attempts."""
-    try:
-        import pathlib
-        notes_dir = pathlib.Path(__file__).parent / "call_notes"
-        notes_dir.mkdir(exist_ok=True)
+    """Save a JSON call note for no-answer/failed call attempts.
 
-        timestamp = datetime.now().isoformat()
-        filename = f"call_notes_{phone_number}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    Blocking; call it via `_run_io` from async code.
+    """
+    try:
+        now = datetime.now()
+        timestamp = now.isoformat()
+        filename = f"call_notes_{phone_number}_{now.strftime('%Y%m%d_%H%M%S')}.json"
         filepath = notes_dir / filename
 
         safe_dial = dial_info or {}
@@ -105,15 +518,96 @@ def save_no_answer_note(phone_number: str, reason: str, dial_info: dict[str, Any
             "priority": safe_dial.get("priority", "normal")
         }
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(note, f, ensure_ascii=False, indent=2)
+        filepath.write_bytes(_dump_json_pretty(note))
 
-        logger.info(f"Saved no-answer note to: {filepath}")
+        logger.info("Saved no-answer note to: %s", filepath)
         return str(filepath)
-    except Exception as e:
-        logger.error(f"Failed to save no-answer note: {e}")
+    except Exception:
+        logger.exception("Failed to save no-answer note")
         return None
 
+
+async def _save_no_answer_note_bounded(
+    phone_number: str, reason: str, dial_info: dict[str, Any] | None, timeout_s: float = 2.0
+) -> None:
+    """Save the no-answer note off the loop, waiting at most `timeout_s`.
+
+    Used right before hangup/shutdown so a slow disk can't hold teardown; a
+    write that overruns keeps going on the I/O pool.
+    """
+    try:
+        async with _timeout(timeout_s):
+            await _run_io(save_no_answer_note, phone_number, reason=reason, dial_info=dial_info)
+    except asyncio.TimeoutError:
+        logger.warning("no-answer note for %s still writing after %ss", phone_number, timeout_s)
+
+# Strong refs to fire-and-forget tasks so they aren't collected mid-flight
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _write_notes_batch(batch: dict[pathlib.Path, str]) -> None:
+    # Raw open/write/close per file; skips the buffered text-IO layer and
+    # the extra fstat/ioctl/lseek calls that open() makes
+    for path, text in batch.items():
+        data = text.encode("utf-8")
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+
+
+class _NotesWriter:
+    """Per-call medical report writer.
+
+    One task drains the queue; snapshots queued while a write is running
+    (e.g. save_notes followed by end_call) are coalesced into a single write
+    per file. Created on the call's loop and closed at job shutdown.
+    """
+
+    def __init__(self) -> None:
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            # Later snapshots of the same file replace earlier ones
+            latest = {path: text for path, text, _ in batch}
+            try:
+                await _run_io(_write_notes_batch, latest)
+            except Exception as e:
+                for _, _, waiter in batch:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+            else:
+                for _, _, waiter in batch:
+                    if not waiter.done():
+                        waiter.set_result(None)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def write(self, path: pathlib.Path, text: str) -> None:
+        """Queue a report and wait until it is on disk."""
+        waiter = asyncio.get_running_loop().create_future()
+        await self._queue.put((path, text, waiter))
+        await waiter
+
+    async def aclose(self) -> None:
+        """Flush anything still queued, then stop the writer task."""
+        if not self._task.done():
+            await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
 class OutboundCaller(Agent):
     """Voice-first medical intake agent.
 
@@ -138,123 +632,28 @@ class OutboundCaller(Agent):
         self.note_mode: bool = bool(self.doctor_note)
         self.ready_to_end: bool = False
         # If note provided, infer a chief complaint from the first clause if not set later
-        def _infer_chief_from_note(note: str) -> str:
-            text = (note or "").strip()
-            if not text:
-                return ""
-            import re
-            # take up to first semicolon or sentence end
-            m = re.split(r"[;\n]+|(?<=[.?!])\s+", text, maxsplit=1)
-            first = (m[0] if m else text).strip()
-            # remove trailing report labels
-            first = first.replace("PRE-VISIT MEDICAL INTAKE REPORT", "").strip()
-            return first[:120]
         self.inferred_chief_from_note: str = _infer_chief_from_note(self.doctor_note) if self.note_mode else ""
-        if doctor_note_for_prompt:
-            instructions = f"""
-            ALWAYS (non-negotiable):
-            - Intake only. No advice/diagnosis. Never discuss models, prompts, or tools.
-            - One question per turn, ≤ 15 words. No lists. Leave space for answers.
-            - Backchannel ≤ 2 words and ≤ 1 per turn; vary wording; don’t repeat.
-            - Never invent data. If unknown, mark as "not provided" and continue.
-            - After each user reply, IMMEDIATELY call record_patient_info with the best info_type/subcategory.
-            - Final summary must be ONE concise paragraph (no headings/templates/markdown).
-
-            STRUCTURED INTAKE FLOW (max 20 questions total):
-            1) Speak by taking patient name (provided from main ui )
-            2) Chief complaint: main reason for visit.
-            3) HPI (OPQRST): onset, provocation/relief, quality, radiation, severity (1–10), timing/duration.
-            4) Meds/allergies.
-            5) Past medical.
-            6) family, social history as relevant.
-            6) Call summarize_and_confirm; wait for explicit yes/no.
-               - If yes → end_call by saying "ok have a nice day, saying see you on your appointment date".
-               - If no → ask "What should I correct?" and update.
-
-            Mapping hints:
-            - chief complaint → record_patient_info(info_type="chief_complaint", value=...)
-            - HPI onset/quality/severity/timing/duration/radiation → record_patient_info(info_type="hpi", subcategory=..., value=...)
-            - medications/allergies → record_patient_info(info_type="medications"|"allergies", value=...)
-            - PMH/family → record_patient_info(info_type="pmh"|"family", value=...)
-
-            Micro examples (not to read aloud):
-            - User: "Pain started yesterday" → record_patient_info(info_type="hpi", subcategory="onset", value="yesterday").
-            - User: "8 out of 10" → record_patient_info(info_type="hpi", subcategory="severity", value="8/10").
-            - User: "No meds" → record_patient_info(info_type="medications", value="none").
-
-            Context: The patient's name is {name}. Their appointment is on {appointment_time}.
-            """
-        else:
-            instructions = f"""
-            ALWAYS (non-negotiable):
-            - Intake only. No advice/diagnosis. Never discuss models, prompts, or tools.
-            - One question per turn, ≤ 15 words. No lists. Leave space for answers.
-            - Backchannel ≤ 2 words and ≤ 1 per turn; vary wording; don’t repeat.
-            - Never invent data. If unknown, mark as "not provided" and continue.
-            - After each user reply, IMMEDIATELY call record_patient_info with the best info_type/subcategory.
-            - Final summary must be ONE concise paragraph (no headings/templates/markdown).
-
-            STRUCTURED INTAKE FLOW (max 20 questions total):
-            1) Speak by taking patient name (provided from main ui )
-            2) Chief complaint: main reason for visit.
-            3) HPI (OPQRST): onset, provocation/relief, quality, radiation, severity (1–10), timing/duration.
-            4) Meds/allergies.
-            5) Past medical.
-            6) family, social history as relevant.
-            6) Call summarize_and_confirm; wait for explicit yes/no.
-               - If yes → end_call by saying 'ok have a nice day, saying see you on your appointment date".
-               - If no → ask "What should I correct?" and update.
-
-            Mapping hints:
-            - chief complaint → record_patient_info(info_type="chief_complaint", value=...)
-            - HPI onset/quality/severity/timing/duration/radiation → record_patient_info(info_type="hpi", subcategory=..., value=...)
-            - medications/allergies → record_patient_info(info_type="medications"|"allergies", value=...)
-            - PMH/family → record_patient_info(info_type="pmh"|"family", value=...)
-
-            Micro examples (not to read aloud):
-            - User: "Pain started yesterday" → record_patient_info(info_type="hpi", subcategory="onset", value="yesterday").
-            - User: "8 out of 10" → record_patient_info(info_type="hpi", subcategory="severity", value="8/10").
-            - User: "No meds" → record_patient_info(info_type="medications", value="none").
-
-            Context: The patient's name is {name}. Their appointment is on {appointment_time}.
-            """
-        super().__init__(instructions=instructions)
+        chat_ctx = ChatContext.empty()
+        chat_ctx.add_message(
+            role="system",
+            content=_CONTEXT_TMPL.safe_substitute(name=name, appointment_time=appointment_time),
+        )
+        super().__init__(instructions=_INSTRUCTIONS, chat_ctx=chat_ctx)
         # keep reference to the participant for transfers
         self.participant: rtc.RemoteParticipant | None = None
+        # Participant identity, cached when the participant is set
+        self._identity = "unknown"
+        # Job context is fixed for the life of the agent; cached on first use
+        self._job_ctx: JobContext | None = None
         self.dial_info = dial_info
         
         # Enhanced patient information structure for medical reports
         # This structure is persisted into the TXT report and updated throughout the call.
-        self.patient_info = {
-            "name": "",
-            "appointment_date": "",
-            "chief_complaint": "",
-            "history_of_present_illness": {
-                "onset": "",
-                "provocation": "",
-                "quality": "",
-                "radiation": "",
-                "severity": "",
-                "timing": "",
-                "duration": ""
-            },
-            "review_of_systems": {
-                "constitutional": "",
-                "cardiovascular": "",
-                "respiratory": "",
-                "gastrointestinal": "",
-                "musculoskeletal": "",
-                "neurological": "",
-                "psychiatric": "",
-                "pertinent_negatives": []
-            },
-            "medications": "",
-            "allergies": "",
-            "past_medical_history": "",
-            "social_history": "",
-            "family_history": "",
-            "additional_notes": ""
-        }
+        self.patient_info = PatientInfo()
+        # Memoized _count_recorded_items(); None means recount on next read
+        self._recorded_count: int | None = None
+        # Report writer for this call; created on first save, closed at shutdown
+        self._notes_writer: _NotesWriter | None = None
         
         # Template support removed
         self.template_opening = ""
@@ -264,7 +663,7 @@ class OutboundCaller(Agent):
         
         # Track interview progress
         # `question_count` can be used for analytics; `_count_recorded_items` tracks data density.
-        self.interview_phase = "identification"
+        self.interview_phase = InterviewPhase.IDENTIFICATION
         self.question_count = 0
         self.max_questions = 20
         
@@ -285,6 +684,7 @@ class OutboundCaller(Agent):
         self.awaiting_confirmation: bool = False
         self.user_confirmed: bool = False
         self.summary_done: bool = False
+        self.confirmation_handled: bool = False
         # Identification steps
         self.id_name_done: bool = True
         self.id_chief_done: bool = False
@@ -293,33 +693,38 @@ class OutboundCaller(Agent):
         self.awaiting_user_reply: bool = False
 
     def _count_recorded_items(self) -> int:
-        """Count how many structured fields have been recorded to estimate progress."""
-        count = 0
-        # Top-level fields
-        for key in ["chief_complaint", "medications", "allergies", "past_medical_history", "name", "appointment_date"]:
-            val = self.patient_info.get(key)
-            if isinstance(val, str) and val.strip():
-                count += 1
-        # HPI subfields
-        for key, val in self.patient_info.get("history_of_present_illness", {}).items():
-            if isinstance(val, str) and val.strip():
-                count += 1
-        # ROS subfields (ignore list of negatives for counting simplicity)
-        for key, val in self.patient_info.get("review_of_systems", {}).items():
-            if key == "pertinent_negatives":
-                continue
-            if isinstance(val, str) and val.strip():
-                count += 1
-        return count
+        """Count how many structured fields have been recorded to estimate progress.
+
+        Cached until the next write to `patient_info`; writers reset
+        `_recorded_count` to None.
+        """
+        if self._recorded_count is None:
+            info = self.patient_info
+            hpi = info.history_of_present_illness
+            # ROS subfields only; the list of negatives is ignored for counting simplicity
+            ros = info.review_of_systems
+            self._recorded_count = (
+                sum(1 for key in _COUNTED_INFO_FIELDS if getattr(info, key).strip())
+                + sum(1 for key in HPI_FIELDS if getattr(hpi, key).strip())
+                + sum(1 for key in ROS_SYSTEMS if getattr(ros, key).strip())
+            )
+        return self._recorded_count
 
     def set_participant(self, participant: rtc.RemoteParticipant):
         self.participant = participant
+        self._identity = participant.identity
         self.connected = True
+        self._job_ctx = get_job_context()
+
+    def _get_job_ctx(self) -> JobContext:
+        if self._job_ctx is None:
+            self._job_ctx = get_job_context()
+        return self._job_ctx
 
     async def hangup(self):
         """Helper function to hang up the call by deleting the room"""
 
-        job_ctx = get_job_context()
+        job_ctx = self._get_job_ctx()
         await job_ctx.api.room.delete_room(
             api.DeleteRoomRequest(
                 room=job_ctx.room.name,
@@ -334,235 +739,184 @@ class OutboundCaller(Agent):
         if not transfer_to:
             return "cannot transfer call"
 
-        logger.info(f"transferring call to {transfer_to}")
+        logger.info("transferring call to %s", transfer_to)
 
         # let the message play fully before transferring
         await ctx.session.generate_reply(
-            instructions="let the user know you'll be transferring them"
+            instructions="let the user know you'll be transferring them" + _SHORT_REPLY
         )
 
-        job_ctx = get_job_context()
+        job_ctx = self._get_job_ctx()
         try:
-            await ctx.api.sip.transfer_sip_participant(
+            await job_ctx.api.sip.transfer_sip_participant(
                 api.TransferSIPParticipantRequest(
                     room_name=job_ctx.room.name,
-                    participant_identity=self.participant.identity,
+                    participant_identity=self._identity,
                     transfer_to=f"tel:{transfer_to}",
                 )
             )
 
-            logger.info(f"transferred call to {transfer_to}")
-        except Exception as e:
-            logger.error(f"error transferring call: {e}")
+            logger.info("transferred call to %s", transfer_to)
+        except Exception:
+            logger.exception("error transferring call")
             await ctx.session.generate_reply(
-                instructions="there was an error transferring the call."
+                instructions="there was an error transferring the call." + _SHORT_REPLY
             )
             await self.hangup()
 
     @function_tool()
     async def end_call(self, ctx: RunContext):
         """Called when the user wants to end the call"""
-        who = self.participant.identity if self.participant else 'unknown'
-        logger.info(f"ending the call for {who}")
+        who = self._identity
+        logger.info("ending the call for %s", who)
 
         # Prevent premature end in note-mode unless a summary has been delivered
-        if getattr(self, 'note_mode', False) and not getattr(self, 'ready_to_end', False):
+        if self.note_mode and not self.ready_to_end:
             logger.info("Blocking premature end_call: waiting for summary/confirmation in note-mode")
             await ctx.session.generate_reply(
-                instructions="Politely explain you'll continue with a couple of brief questions and summarize before ending."
+                instructions="Politely explain you'll continue with a couple of brief questions and summarize before ending." + _SHORT_REPLY
             )
             return
 
         # Generate final call summary
         # Persist a last snapshot of collected fields and status prior to hangup.
+        now = datetime.now()
         final_summary = {
             "patient_info": self.patient_info,
             "call_duration": "completed",
             "status": "call_ended",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
             
         }
         
         # If no questions were asked and this was note-driven, include a concise explanation
-        if getattr(self, 'doctor_note', None) and self._count_recorded_items() == 0:
+        if self.doctor_note and self._count_recorded_items() == 0:
             final_summary["status"] = "call_ended_no_answers_note_mode"
         
-        logger.info(f"Final call summary: {final_summary}")
+        logger.debug("Final call summary: %s", final_summary)
         
-        # Save professional medical report to file
-        saved_path = await self.save_medical_report(final_summary)
+        # Save professional medical report to file in the background so the
+        # goodbye playout and hangup aren't held up by disk I/O
+        save_task = asyncio.create_task(self.save_medical_report(final_summary, now=now))
+        _background_tasks.add(save_task)
+        save_task.add_done_callback(_background_tasks.discard)
         # Persist summary to patient DB - removed
         # try:
         #     save_call_summary(Path(__file__).parent / "patients.db", who, self.generate_medical_report(), (self.dial_info or {}).get("doctor_note"))
         # except Exception as e:
-        #     logger.warning(f"DB save summary error: {e}")
+        #     logger.warning("DB save summary error: %s", e)
         
         # let the agent finish speaking
         await ctx.wait_for_playout()
 
         await self.hangup()
+        await save_task
 
     def get_call_summary(self):
-        """Get the current call summary"""
+        """Get the current call summary.
+
+        `patient_info` in the returned dict is the live record, not a snapshot.
+        """
         if self.call_summary:
             return self.call_summary
         else:
             # Generate a basic summary from patient info
             return {
-                "patient_info": self.patient_info.copy(),
+                "patient_info": self.patient_info,
                 "call_duration": "in_progress",
                 "status": "no_summary_generated",
                 "timestamp": datetime.now().isoformat(),
                 
             }
 
-    async def save_medical_report(self, call_summary):
-        """Save professional medical report to a TXT file"""
+    async def save_medical_report(self, call_summary, now: datetime | None = None):
+        """Save professional medical report to a TXT file.
+
+        `now` lets callers that already stamped `call_summary` reuse that clock read.
+        """
         try:
-            # Create call_notes directory if it doesn't exist
-            import pathlib
-            notes_dir = pathlib.Path(__file__).parent / "call_notes"
-            notes_dir.mkdir(exist_ok=True)
-            
             # Generate filename with timestamp and phone number
-            phone_number = self.participant.identity if self.participant else "unknown"
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            phone_number = self._identity
+            now = now or datetime.now()
+            timestamp = now.strftime("%Y%m%d_%H%M%S")
             filename = f"medical_report_{phone_number}_{timestamp}.txt"
             filepath = notes_dir / filename
             
             # Generate professional medical report
             medical_report = self.generate_medical_report()
             
-            # Create comprehensive text report
-            # Prefer a computed question metric if the tracked count is zero
-            
-            text_report = f"""
-{medical_report}
-
-CALL INFORMATION:
-Phone Number: {phone_number}
-Call Date: {call_summary["timestamp"]}
-Call Duration: {call_summary["call_duration"]}
-Call Status: {call_summary["status"]}
-Report Type: Pre-visit Medical Screening
-Priority: Normal
-
-PATIENT SUMMARY:
-Name: {call_summary["patient_info"].get("name", "Not provided")}
-Appointment Date: {call_summary["patient_info"].get("appointment_date", "Not provided")}
-Chief Complaint: {call_summary["patient_info"].get("chief_complaint", "Not specified")}
-
-NOTES:
-This medical intake report was generated during a pre-visit screening call. The information collected helps healthcare providers prepare for the patient's appointment by understanding their current symptoms, medical history, and medication needs. All information should be verified during the actual medical visit.
-
-Report generated by AI Medical Intake Specialist
-Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-            """
+            # Create comprehensive text report as one join over its lines
+            info = call_summary["patient_info"]
+            lines = [
+                medical_report,
+                "",
+                "CALL INFORMATION:",
+                f"Phone Number: {phone_number}",
+                f"Call Date: {call_summary['timestamp']}",
+                f"Call Duration: {call_summary['call_duration']}",
+                f"Call Status: {call_summary['status']}",
+                "Report Type: Pre-visit Medical Screening",
+                "Priority: Normal",
+                "",
+                "PATIENT SUMMARY:",
+            ]
+            # Only list the patient fields that were actually captured
+            for label, value in (
+                ("Name", info.name),
+                ("Appointment Date", info.appointment_date),
+                ("Chief Complaint", info.chief_complaint),
+            ):
+                if value:
+                    lines.append(f"{label}: {value}")
+            lines.extend(_REPORT_NOTES_LINES)
+            lines.append(f"Generated on: {now.strftime('%Y-%m-%d %H:%M:%S')}")
+            text_report = "\n".join(lines)
             
-            # Save to TXT file
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(text_report.strip())
+            # Batched through this call's writer, off the event loop
+            if self._notes_writer is None:
+                self._notes_writer = _NotesWriter()
+            await self._notes_writer.write(filepath, text_report)
             
-            logger.info(f"Medical report saved to: {filepath}")
+            logger.info("Medical report saved to: %s", filepath)
             return str(filepath)
             
-        except Exception as e:
-            logger.error(f"Error saving medical report: {e}")
+        except Exception:
+            logger.exception("Error saving medical report")
             return None
 
+    async def close_notes_writer(self) -> None:
+        """Flush pending report writes and stop the writer (job shutdown)."""
+        if self._notes_writer is not None:
+            await self._notes_writer.aclose()
+            self._notes_writer = None
+
     def generate_medical_report(self):
         """Generate a professional medical report in paragraph format.
-        If a doctor note is present and little/no patient info was collected,
-        generate a concise note-driven paragraph instead of the full template.
+
+        Standard mode: a narrative paragraph from HPI/ROS/Meds/History.
+        `NoteModeOutboundCaller` overrides this with the note-driven summary.
         """
-        # Two modes:
-        # 1) Note-driven: summarize conversation fields in one paragraph
-        # 2) Standard: construct a narrative paragraph from HPI/ROS/Meds/History
-        # If a doctor note is present, always produce a single-paragraph conversation summary
-        minimal_info = not (
-            self.patient_info.get('chief_complaint')
-            or any(self.patient_info['history_of_present_illness'].values())
-            or self.patient_info.get('medications')
-            or self.patient_info.get('allergies')
-            or self.patient_info.get('past_medical_history')
-        )
-        if self.doctor_note:
-            summary_parts: list[str] = []
-            if self.patient_info['name']:
-                summary_parts.append(f"Patient identified as {self.patient_info['name']}.")
-            elif (self.dial_info or {}).get('patient_name'):
-                summary_parts.append(f"Patient identified as {(self.dial_info or {}).get('patient_name')}.")
-            chief = self.patient_info.get('chief_complaint') or getattr(self, 'inferred_chief_from_note', '')
-            if chief:
-                summary_parts.append(f"Primary concern is {chief}.")
-            hpi = self.patient_info['history_of_present_illness']
-            hpi_bits: list[str] = []
-            if hpi.get('quality'):
-                hpi_bits.append(hpi['quality'])
-            if hpi.get('onset'):
-                hpi_bits.append(f"onset {hpi['onset']}")
-            if hpi.get('severity'):
-                hpi_bits.append(f"severity {hpi['severity']}")
-            if hpi.get('duration'):
-                hpi_bits.append(f"duration {hpi['duration']}")
-            if hpi.get('timing'):
-                hpi_bits.append(f"timing {hpi['timing']}")
-            if hpi.get('radiation'):
-                hpi_bits.append(f"radiation {hpi['radiation']}")
-            if hpi_bits:
-                summary_parts.append("History of present illness: " + ", ".join(hpi_bits) + ".")
-            if self.patient_info.get('past_medical_history'):
-                summary_parts.append(f"Relevant history includes {self.patient_info['past_medical_history']}.")
-            if self.patient_info.get('medications'):
-                summary_parts.append(f"Current medications include {self.patient_info['medications']}.")
-            if self.patient_info.get('allergies'):
-                summary_parts.append(f"Allergies: {self.patient_info['allergies']}.")
-            ros = self.patient_info.get('review_of_systems', {})
-            ros_bits: list[str] = []
-            for key in ['respiratory', 'cardiovascular', 'gastrointestinal', 'musculoskeletal', 'neurological', 'psychiatric']:
-                val = ros.get(key)
-                if isinstance(val, str) and val.strip():
-                    # Clean internal tags like "obstructive_sleep_apnea_risk_factors: "
-                    clean_val = val.replace("obstructive_sleep_apnea_risk_factors: ", "").strip()
-                    ros_bits.append(f"{key.capitalize()}: {clean_val}")
-            if ros_bits:
-                summary_parts.append("Review of systems: " + "; ".join(ros_bits) + ".")
-            if self.patient_info.get('additional_notes'):
-                summary_parts.append(self.patient_info['additional_notes'].replace("past_medical_history (anesthesia_problems): ", "Anesthesia: "))
-            if minimal_info and not summary_parts:
-                summary_parts.append("No patient responses were captured during this call.")
-            # Build paragraph using conversation-derived fields only
-            paragraph = " ".join(summary_parts).strip()
-            import textwrap
-            wrapped_paragraph = textwrap.fill(paragraph, width=92)
-
-            effective_q = max(self.question_count, self._count_recorded_items())
-            report = f"""
-PRE-VISIT MEDICAL INTAKE REPORT
-
-Note-Driven Conversation Summary:
-{wrapped_paragraph}
-            """
-            return report.strip()
+        info = self.patient_info
+        hpi = info.history_of_present_illness
         # Incorporate QA log if present (template mode)
         qa_section = ""
-        if getattr(self, 'qa_log', None):
+        if self.qa_log:
             pairs = [f"- {p.get('question')}: {p.get('answer')}" for p in self.qa_log]
             qa_section = "\nTemplate Q&A Summary:\n" + "\n".join(pairs)
         
         # Build a narrative HPI paragraph matching the requested style
-        onset = (self.patient_info['history_of_present_illness']['onset'] or '').strip()
-        quality = (self.patient_info['history_of_present_illness']['quality'] or '').strip()
-        severity = (self.patient_info['history_of_present_illness']['severity'] or '').strip()
-        timing = (self.patient_info['history_of_present_illness']['timing'] or '').strip()
-        radiation = (self.patient_info['history_of_present_illness']['radiation'] or '').strip()
-        duration = (self.patient_info['history_of_present_illness']['duration'] or '').strip()
-        chief_local = (self.patient_info['chief_complaint'] or self.inferred_chief_from_note).strip()
+        onset = hpi.onset.strip()
+        quality = hpi.quality.strip()
+        severity = hpi.severity.strip()
+        timing = hpi.timing.strip()
+        radiation = hpi.radiation.strip()
+        duration = hpi.duration.strip()
+        chief_local = (info.chief_complaint or self.inferred_chief_from_note).strip()
         # Pull constitutional/ROS for supportive symptoms and denials
-        ros_map_local = self.patient_info.get('review_of_systems', {}) or {}
-        constitutional = (ros_map_local.get('constitutional') or '').strip()
-        respiratory_ros = (ros_map_local.get('respiratory') or '').strip().lower()
-        cardiovascular_ros = (ros_map_local.get('cardiovascular') or '').strip().lower()
+        ros = info.review_of_systems
+        constitutional = ros.constitutional.strip()
+        respiratory_ros = ros.respiratory.strip().lower()
+        cardiovascular_ros = ros.cardiovascular.strip().lower()
 
         # Sentences
         hpi_sentences: list[str] = []
@@ -574,8 +928,7 @@ Note-Driven Conversation Summary:
         if severity or quality:
             sev_text = ''
             if severity:
-                sev_val = severity if any(ch.isdigit() for ch in severity) else severity
-                sev_text = f"with an intensity estimated at {sev_val} on a 10‑point scale"
+                sev_text = f"with an intensity estimated at {severity} on a 10‑point scale"
             qual_text = f"The discomfort is described as {quality}" if quality else ''
             if qual_text and sev_text:
                 hpi_sentences.append(f"{qual_text}, {sev_text}.")
@@ -584,12 +937,13 @@ Note-Driven Conversation Summary:
             elif sev_text:
                 hpi_sentences.append(f"The discomfort is {sev_text}.")
         # Associated symptoms from constitutional/quality
-        assoc_bits: list[str] = []
-        for token in ["fatigue", "chill", "weakness", "malaise"]:
-            if token in (constitutional or '').lower() or token in quality.lower():
-                assoc_bits.append(token + ('' if token.endswith('s') else 's') if token == 'chill' else token)
+        assoc_bits = {
+            "chills" if token == "chill" else token
+            for text in (constitutional.lower(), quality.lower())
+            for token in _ASSOC_SYMPTOM_RE.findall(text)
+        }
         if assoc_bits:
-            pretty = ", ".join(sorted(set(assoc_bits))).replace('chills', 'chills')
+            pretty = ", ".join(sorted(assoc_bits))
             hpi_sentences.append(f"In addition, the patient notes {pretty}, contributing to an overall sense of weakness.")
         # Course / timing and radiation
         if timing:
@@ -598,9 +952,10 @@ Note-Driven Conversation Summary:
             hpi_sentences.append(f"Pain/radiation noted: {radiation}.")
         # Denials from ROS
         denial_list: list[str] = []
-        if 'chest pain' in cardiovascular_ros or 'negative for chest pain' in cardiovascular_ros or 'no chest pain' in cardiovascular_ros:
+        # "no chest pain"/"negative for dyspnea" etc. all contain the base term
+        if 'chest pain' in cardiovascular_ros:
             denial_list.append('chest pain')
-        if 'dyspnea' in respiratory_ros or 'shortness of breath' in respiratory_ros or 'no shortness of breath' in respiratory_ros or 'negative for dyspnea' in respiratory_ros:
+        if _DYSPNEA_RE.search(respiratory_ros):
             denial_list.append('shortness of breath')
         if denial_list:
             both = ' or '.join(denial_list)
@@ -608,84 +963,243 @@ Note-Driven Conversation Summary:
         # If still empty, anchor with chief complaint
         if not hpi_sentences and chief_local:
             hpi_sentences.append(f"Presenting with {chief_local}.")
-        hpi_text = ' '.join(hpi_sentences).strip()
 
-        # Build medical history paragraph (only if present)
+        # Build one narrative paragraph across all sections; every section
+        # appends finished sentences here and the paragraph is joined once
+        ui_name_local = (self.dial_info or {}).get('patient_name') or ''
+        chief = (info.chief_complaint or self.inferred_chief_from_note).strip()
+        narrative_bits: list[str] = []
+        if (info.name or ui_name_local):
+            narrative_bits.append(f"Patient {info.name or ui_name_local} presents for pre‑visit intake.")
+        if info.appointment_date:
+            narrative_bits.append(f"Upcoming appointment on {info.appointment_date}.")
+        if chief:
+            narrative_bits.append(f"Primary concern: {chief.rstrip('. ')}.")
+        narrative_bits.extend(hpi_sentences)
+
+        # Medical history (only if present); parts are stored without trailing periods
         medical_history_parts: list[str] = []
-        pmh = (self.patient_info['past_medical_history'] or '').strip()
-        fam = (self.patient_info['family_history'] or '').strip()
+        pmh = info.past_medical_history.strip()
+        fam = info.family_history.strip()
         if pmh:
             medical_history_parts.append(pmh.rstrip('. '))
         if fam:
             medical_history_parts.append(f"Family history: {fam.rstrip('. ')}")
         medical_history_text = '. '.join(medical_history_parts)
+        if medical_history_text:
+            narrative_bits.append(f"Relevant history: {medical_history_text}.")
+
+        # Medications/allergies
+        meds = info.medications.strip()
+        algs = info.allergies.strip()
+        if meds:
+            narrative_bits.append(f"Current medications include {meds.rstrip('. ')}.")
+        if algs:
+            narrative_bits.append(f"Allergies: {algs.rstrip('. ')}.")
 
-        # Build medications/allergies paragraph (expand with clarity)
-        meds = (self.patient_info['medications'] or '').strip()
-        algs = (self.patient_info['allergies'] or '').strip()
-        medall_text = ''
-        if meds and algs:
-            medall_text = f"Current medications include {meds.rstrip('. ')}. Allergies: {algs.rstrip('. ')}."
-        elif meds:
-            medall_text = f"Current medications include {meds.rstrip('. ')}."
-        elif algs:
-            medall_text = f"Allergies: {algs.rstrip('. ')}."
-
-        # Build review of systems narrative (positives and pertinent negatives)
-        ros_map = self.patient_info.get('review_of_systems', {}) or {}
+        # Review of systems narrative (positives and pertinent negatives)
         ros_bits: list[str] = []
-        for sys_key in [
-            'constitutional', 'respiratory', 'cardiovascular', 'gastrointestinal',
-            'musculoskeletal', 'neurological', 'psychiatric'
-        ]:
-            val = (ros_map.get(sys_key) or '').strip()
+        for sys_key in _STANDARD_ROS_ORDER:
+            val = getattr(ros, sys_key).strip()
             if val:
-                ros_bits.append(f"{sys_key.capitalize()}: {val.rstrip('. ')}.")
-        negs = ros_map.get('pertinent_negatives') or []
-        neg_text = ''
-        if isinstance(negs, list) and negs:
-            neg_text = "Pertinent negatives: " + ", ".join(negs) + "."
-        ros_text = " ".join(ros_bits + ([neg_text] if neg_text else [])).strip()
-
-        # Build one narrative paragraph across all sections
-        ui_name_local = (self.dial_info or {}).get('patient_name') or ''
-        chief = (self.patient_info['chief_complaint'] or self.inferred_chief_from_note).strip()
-        narrative_bits: list[str] = []
-        if (self.patient_info['name'] or ui_name_local):
-            narrative_bits.append(f"Patient {self.patient_info['name'] or ui_name_local} presents for pre‑visit intake.")
-        if self.patient_info['appointment_date']:
-            narrative_bits.append(f"Upcoming appointment on {self.patient_info['appointment_date']}.")
-        if chief:
-            narrative_bits.append(f"Primary concern: {chief.rstrip('. ')}.")
-        if hpi_text:
-            narrative_bits.append(hpi_text.rstrip())
-        if medical_history_text:
-            narrative_bits.append(f"Relevant history: {medical_history_text.rstrip('.')}.")
-        if medall_text:
-            narrative_bits.append(medall_text.rstrip())
-        if ros_text:
-            narrative_bits.append(f"Review of systems: {ros_text.rstrip()}" )
-        if self.patient_info.get('social_history'):
-            narrative_bits.append(f"Social history: {self.patient_info['social_history'].rstrip('. ')}.")
-        if self.patient_info.get('family_history'):
-            narrative_bits.append(f"Family history: {self.patient_info['family_history'].rstrip('. ')}.")
+                ros_bits.append(f"{_ROS_LABELS[sys_key]}: {val.rstrip('. ')}.")
+        negs = ros.pertinent_negatives
+        if negs:
+            ros_bits.append("Pertinent negatives: " + ", ".join(negs) + ".")
+        if ros_bits:
+            narrative_bits.append("Review of systems: " + " ".join(ros_bits))
+        if info.social_history:
+            narrative_bits.append(f"Social history: {info.social_history.rstrip('. ')}.")
+        if info.family_history:
+            narrative_bits.append(f"Family history: {info.family_history.rstrip('. ')}.")
         # Preliminary impression
         impression_bits: list[str] = []
+        # Lower-case once; impression keyword probes all search this
+        impression_text = f"{chief} {quality}".lower()
         if onset:
             impression_bits.append("subacute onset")
         if severity:
             impression_bits.append("significant severity")
-        if 'fever' in (chief.lower() + ' ' + quality.lower()):
+        if 'fever' in impression_text:
             impression_bits.append("febrile symptoms")
         if impression_bits:
             narrative_bits.append((", ".join(impression_bits)).capitalize() + ". Correlate clinically.")
-        narrative = " ".join([s for s in narrative_bits if s]).strip()
-        report = "\n".join([
-            "PRE-VISIT MEDICAL INTAKE REPORT",
-            "",
-            narrative or "",
-        ])
-        return report.strip()
+        # Every section appends only non-empty, already-punctuated sentences
+        narrative = " ".join(narrative_bits)
+        return _STANDARD_REPORT_TMPL.substitute(narrative=narrative).strip()
+
+    # Per-info_type handlers for record_patient_info. Each takes
+    # (info_type, value, subcategory) and may return a response dict to
+    # short-circuit the default acknowledgement.
+    def _record_name(self, info_type: str, value: str, subcategory: str | None):
+        self.patient_info.name = value
+        self.id_name_done = True
+
+    def _record_appointment_date(self, info_type: str, value: str, subcategory: str | None):
+        self.patient_info.appointment_date = value
+        self.id_appt_done = True
+
+    def _record_chief_complaint(self, info_type: str, value: str, subcategory: str | None):
+        self.patient_info.chief_complaint = value
+        self.id_chief_done = True
+
+    def _record_infection(self, info_type: str, value: str, subcategory: str | None):
+        # Map generic infection/fever info into ROS constitutional
+        self.patient_info.review_of_systems.constitutional = value
+
+    def _record_hpi(self, info_type: str, value: str, subcategory: str | None):
+        if not subcategory:
+            return self._record_unmapped(info_type, value, subcategory)
+        # Map common synonyms and ensure we don't drop unknown subcategories
+        mapped = subcategory
+        if subcategory == "description":
+            mapped = "quality"
+        if mapped in HPI_FIELDS:
+            setattr(self.patient_info.history_of_present_illness, mapped, value)
+        else:
+            # Store unknown HPI data in additional notes so it's not lost
+            existing = self.patient_info.additional_notes
+            joiner = "\n" if existing else ""
+            self.patient_info.additional_notes = f"{existing}{joiner}HPI ({subcategory}): {value}"
+
+    def _record_ros(self, info_type: str, value: str, subcategory: str | None):
+        if not subcategory:
+            return self._record_unmapped(info_type, value, subcategory)
+        ros = self.patient_info.review_of_systems
+        if subcategory in ROS_SYSTEMS:
+            setattr(ros, subcategory, value)
+        elif subcategory.lower() == "dyspnea":
+            # Map dyspnea to respiratory ROS
+            ros.respiratory = value
+
+    def _record_pertinent_negative(self, info_type: str, value: str, subcategory: str | None):
+        self.patient_info.review_of_systems.pertinent_negatives.append(value)
+
+    def _record_medications(self, info_type: str, value: str, subcategory: str | None):
+        self.patient_info.medications = value
+
+    def _record_allergies(self, info_type: str, value: str, subcategory: str | None):
+        self.patient_info.allergies = value
+
+    def _record_pmh(self, info_type: str, value: str, subcategory: str | None):
+        self.patient_info.past_medical_history = value
+
+    def _record_social(self, info_type: str, value: str, subcategory: str | None):
+        self.patient_info.social_history = value
+
+    def _record_family(self, info_type: str, value: str, subcategory: str | None):
+        self.patient_info.family_history = value
+
+    def _record_additional(self, info_type: str, value: str, subcategory: str | None):
+        self.patient_info.additional_notes = value
+
+    # Handlers for unknown info_types, picked by keyword in `_record_unmapped`
+    def _unmapped_ignore(self, info_type: str, value: str, subcategory: str | None):
+        # ignore availability/consent flags
+        return {"status": "ignored", "message": "availability noted"}
+
+    def _unmapped_anesthesia(self, info_type: str, value: str, subcategory: str | None):
+        info = self.patient_info
+        pmh = info.past_medical_history
+        joiner = "; " if pmh else ""
+        info.past_medical_history = f"{pmh}{joiner}Anesthesia: {value}".strip()
+
+    def _unmapped_sleep(self, info_type: str, value: str, subcategory: str | None):
+        # Map OSA-related items to HPI timing/quality and ROS respiratory
+        ros = self.patient_info.review_of_systems
+        existing_ros = ros.respiratory
+        tag = (subcategory or "OSA").replace("_", " ")
+        # Build human-friendly fragment without internal tags
+        human_item = value if value and value.lower() not in {"yes", "no"} else tag
+        ros.respiratory = "; ".join(p for p in (existing_ros, human_item) if p).strip()
+        # If daytime sleepiness, also reflect in HPI timing
+        if (subcategory or "").lower().startswith("daytime"):
+            self.patient_info.history_of_present_illness.timing = "daytime sleepiness present"
+
+    def _unmapped_chest(self, info_type: str, value: str, subcategory: str | None):
+        if "pain" not in (info_type or "").lower():
+            return self._unmapped_note(info_type, value, subcategory)
+        hpi = self.patient_info.history_of_present_illness
+        hpi.quality = "; ".join(p for p in (hpi.quality, value) if p).strip()
+
+    def _unmapped_note(self, info_type: str, value: str, subcategory: str | None):
+        # Fallback: stash in additional notes
+        info = self.patient_info
+        existing = info.additional_notes
+        joiner = "\n" if existing else ""
+        info.additional_notes = f"{existing}{joiner}{info_type}{(' ('+subcategory+')') if subcategory else ''}: {value}"
+
+    # (keywords, handler) checked in order; the first substring hit wins
+    _UNMAPPED_RULES = (
+        (("pre-visit",), _unmapped_ignore),
+        (("infection", "fever", "post-op", "postop"), _record_infection),
+        (("anesthesia",), _unmapped_anesthesia),
+        (("sleep", "apnea"), _unmapped_sleep),
+        (("chest",), _unmapped_chest),
+    )
+
+    def _record_unmapped(self, info_type: str, value: str, subcategory: str | None):
+        """Map some common unknown categories to safe fields."""
+        low = (info_type or "").lower()
+        for keywords, handler in self._UNMAPPED_RULES:
+            if any(kw in low for kw in keywords):
+                return handler(self, info_type, value, subcategory)
+        return self._unmapped_note(info_type, value, subcategory)
+
+    _RECORD_DISPATCH = {
+        "name": _record_name,
+        "appointment_date": _record_appointment_date,
+        "chief_complaint": _record_chief_complaint,
+        "infection": _record_infection,
+        "hpi": _record_hpi,
+        "ros": _record_ros,
+        "pertinent_negative": _record_pertinent_negative,
+        "medications": _record_medications,
+        "allergies": _record_allergies,
+        "pmh": _record_pmh,
+        "past_medical_history": _record_pmh,
+        "social": _record_social,
+        "family": _record_family,
+        "additional": _record_additional,
+    }
+
+    # info_types whose handler simply overwrites one PatientInfo field
+    _RECORD_FIELDS = {
+        "name": "name",
+        "appointment_date": "appointment_date",
+        "chief_complaint": "chief_complaint",
+        "medications": "medications",
+        "allergies": "allergies",
+        "pmh": "past_medical_history",
+        "past_medical_history": "past_medical_history",
+        "social": "social_history",
+        "family": "family_history",
+        "additional": "additional_notes",
+    }
+
+    def _record_target(self, info_type: str, subcategory: str | None):
+        """(object, attribute) a record call overwrites, or None.
+
+        Resolves aliases (pmh/past_medical_history, description -> quality,
+        infection -> ROS constitutional) so a repeat is judged against the
+        field's current value. Appending and heuristic handlers return None.
+        """
+        info = self.patient_info
+        field = self._RECORD_FIELDS.get(info_type)
+        if field:
+            return info, field
+        if info_type == "infection":
+            return info.review_of_systems, "constitutional"
+        if info_type == "hpi" and subcategory:
+            mapped = "quality" if subcategory == "description" else subcategory
+            if mapped in HPI_FIELDS:
+                return info.history_of_present_illness, mapped
+        if info_type == "ros" and subcategory:
+            if subcategory in ROS_SYSTEMS:
+                return info.review_of_systems, subcategory
+            if subcategory.lower() == "dyspnea":
+                return info.review_of_systems, "respiratory"
+        return None
 
     @function_tool()
     async def record_patient_info(self, ctx: RunContext, info_type: str, value: str, subcategory: str = None):
@@ -696,172 +1210,102 @@ Note-Driven Conversation Summary:
             value: The information provided by the patient
             subcategory: For structured data like HPI or ROS (onset, provocation, quality, etc.)
         """
+        return self._record_one(info_type, value, subcategory)
+
+    @function_tool()
+    async def record_patient_info_batch(self, ctx: RunContext, items: list[PatientInfoItem]):
+        """Record several pieces of patient information from one reply in a single call
+
+        Args:
+            items: Each item has info_type, value and optional subcategory, as in record_patient_info
+        """
+        results = [self._record_one(item.info_type, item.value, item.subcategory) for item in items]
+        errors = [r for r in results if r.get("status") == "error"]
+        if errors:
+            return {"status": "error", "recorded": len(results) - len(errors), "errors": errors}
+        return {"status": "info_recorded", "recorded": len(results)}
+
+    def _record_one(self, info_type: str, value: str, subcategory: str | None) -> dict[str, Any]:
         # Mapping notes:
         # - Unknown HPI/ROS keys fall back into `additional_notes` so nothing is lost.
         # - Common synonyms are normalized (e.g., description -> quality; dyspnea -> respiratory).
+        # - Unknown info_types go through `_record_unmapped` keyword heuristics.
         try:
-            if info_type == "name":
-                self.patient_info["name"] = value
-                self.id_name_done = True
-            elif info_type == "appointment_date":
-                self.patient_info["appointment_date"] = value
-                self.id_appt_done = True
-            elif info_type == "chief_complaint":
-                self.patient_info["chief_complaint"] = value
-                self.id_chief_done = True
-            elif info_type == "infection":
-                # Map generic infection/fever info into ROS constitutional
-                self.patient_info["review_of_systems"]["constitutional"] = value
-            elif info_type == "hpi" and subcategory:
-                # Map common synonyms and ensure we don't drop unknown subcategories
-                mapped = subcategory
-                if subcategory == "description":
-                    mapped = "quality"
-                if mapped in self.patient_info["history_of_present_illness"]:
-                    self.patient_info["history_of_present_illness"][mapped] = value
-                else:
-                    # Store unknown HPI data in additional notes so it's not lost
-                    existing = self.patient_info.get("additional_notes", "")
-                    joiner = "\n" if existing else ""
-                    self.patient_info["additional_notes"] = f"{existing}{joiner}HPI ({subcategory}): {value}"
-            elif info_type == "ros" and subcategory:
-                if subcategory in self.patient_info["review_of_systems"]:
-                    self.patient_info["review_of_systems"][subcategory] = value
-                elif subcategory.lower() == "dyspnea":
-                    # Map dyspnea to respiratory ROS
-                    self.patient_info["review_of_systems"]["respiratory"] = value
-            elif info_type == "pertinent_negative":
-                self.patient_info["review_of_systems"]["pertinent_negatives"].append(value)
-            elif info_type == "medications":
-                self.patient_info["medications"] = value
-            elif info_type == "allergies":
-                self.patient_info["allergies"] = value
-            elif info_type == "pmh" or info_type == "past_medical_history":
-                self.patient_info["past_medical_history"] = value
-            elif info_type == "social":
-                self.patient_info["social_history"] = value
-            elif info_type == "family":
-                self.patient_info["family_history"] = value
-            elif info_type == "additional":
-                self.patient_info["additional_notes"] = value
-            else:
-                # Map some common unknown categories to safe fields
-                low = (info_type or "").lower()
-                if "pre-visit" in low:
-                    # ignore availability/consent flags
-                    return {"status": "ignored", "message": "availability noted"}
-                if "infection" in low or "fever" in low or "post-op" in low or "postop" in low:
-                    self.patient_info["review_of_systems"]["constitutional"] = value
-                elif "anesthesia" in low:
-                    pmh = self.patient_info.get("past_medical_history", "")
-                    joiner = "; " if pmh else ""
-                    self.patient_info["past_medical_history"] = f"{pmh}{joiner}Anesthesia: {value}".strip()
-                elif "sleep" in low or "apnea" in low:
-                    # Map OSA-related items to HPI timing/quality and ROS respiratory
-                    existing_ros = self.patient_info["review_of_systems"].get("respiratory", "")
-                    tag = (subcategory or "OSA").replace("_", " ")
-                    # Build human-friendly fragment without internal tags
-                    human_item = value if value and value.lower() not in {"yes", "no"} else tag
-                    new_ros = (existing_ros + ("; " if existing_ros and human_item else "") + (human_item or "")).strip()
-                    self.patient_info["review_of_systems"]["respiratory"] = new_ros
-                    # If daytime sleepiness, also reflect in HPI timing
-                    if (subcategory or "").lower().startswith("daytime"):
-                        self.patient_info["history_of_present_illness"]["timing"] = "daytime sleepiness present"
-                elif "chest" in low and "pain" in low:
-                    self.patient_info["history_of_present_illness"]["quality"] = (self.patient_info["history_of_present_illness"].get("quality", "") + ("; " if self.patient_info["history_of_present_illness"].get("quality") else "") + value).strip()
-                else:
-                    # Fallback: stash in additional notes
-                    existing = self.patient_info.get("additional_notes", "")
-                    joiner = "\n" if existing else ""
-                    self.patient_info["additional_notes"] = f"{existing}{joiner}{info_type}{(' ('+subcategory+')') if subcategory else ''}: {value}"
+            # The LLM often repeats a tool call with the same answer; an empty
+            # value still runs its handler so the done flags get set
+            target = self._record_target(info_type, subcategory)
+            if value and target is not None and getattr(*target) == value:
+                return {"status": "unchanged", "info_type": info_type}
+            handler = self._RECORD_DISPATCH.get(info_type, OutboundCaller._record_unmapped)
+            response = handler(self, info_type, value, subcategory)
+            if response is not None:
+                return response
+            self._recorded_count = None
             
-            who = self.participant.identity if self.participant else 'unknown'
-            logger.info(f"Recorded {info_type}: {value} for {who}")
-            return {
-                "status": "info_recorded",
-                "info_type": info_type,
-                "value": value,
-                "all_info": self.patient_info
-            }
+            who = self._identity
+            logger.info("Recorded %s: %s for %s", info_type, value, who)
+            # Keep tool results minimal: they are fed back into the LLM context
+            return {"status": "info_recorded", "info_type": info_type}
         except Exception as e:
-            logger.error(f"Error recording patient info: {e}")
+            logger.exception("Error recording patient info")
             return {"status": "error", "message": f"Error recording info: {str(e)}"}
 
+    def _patient_summary(self) -> str:
+        """Patient-facing recap spoken before asking for confirmation."""
+        info = self.patient_info
+        hpi = info.history_of_present_illness
+        hpi_bits = []
+        if hpi.onset:
+            hpi_bits.append(f"started {hpi.onset}")
+        if hpi.severity:
+            hpi_bits.append(f"severity {hpi.severity}")
+        if hpi.duration:
+            hpi_bits.append(f"duration {hpi.duration}")
+        parts = [
+            _summary_line("Primary concern", info.chief_complaint, "not provided"),
+            *(("History of illness: " + ", ".join(hpi_bits) + ".",) if hpi_bits else ()),
+            _summary_line("Medical history", info.past_medical_history, "none reported"),
+            _summary_line("Current medications", info.medications, "none"),
+            _summary_line("Allergies", info.allergies, "none"),
+        ]
+        return " ".join(parts)
+
     @function_tool()
     async def summarize_and_confirm(self, ctx: RunContext):
         """Generate comprehensive medical summary and ask patient to confirm"""
         # If user already confirmed, don't re-read summary
-        if getattr(self, 'user_confirmed', False):
+        if self.user_confirmed:
             return {
                 "status": "already_confirmed",
                 "message": "User has already confirmed the summary"
             }
         
         # If summary already delivered and awaiting confirmation, don't re-read
-        if getattr(self, 'summary_done', False) and getattr(self, 'awaiting_confirmation', False):
+        if self.summary_done and self.awaiting_confirmation:
             return {
                 "status": "awaiting_confirmation",
                 "message": "Summary already delivered, waiting for user confirmation"
             }
         
         # If summary already delivered, don't repeat speaking it
-        if getattr(self, 'summary_done', False):
+        if self.summary_done:
             return {
                 "status": "summary_already_delivered",
                 "summary": (self.call_summary or {}).get("medical_report", ""),
-                "patient_info": self.patient_info,
-                "call_summary": self.call_summary
             }
         # Generate professional medical report
         medical_report = self.generate_medical_report()
         
         # Create patient-friendly summary
-        if self.doctor_note:
-            # Note-driven: concise summary of collected information
-            parts = []
-            if self.patient_info['chief_complaint']:
-                parts.append(f"Primary concern: {self.patient_info['chief_complaint']}")
-            if self.patient_info['past_medical_history']:
-                parts.append(f"Medical history: {self.patient_info['past_medical_history']}")
-            if self.patient_info['medications']:
-                parts.append(f"Medications: {self.patient_info['medications']}")
-            if self.patient_info['allergies']:
-                parts.append(f"Allergies: {self.patient_info['allergies']}")
-            
-            if parts:
-                summary_text = ". ".join(parts) + "."
-                patient_summary = f"I've collected: {summary_text}"
-            else:
-                patient_summary = "I've captured your details."
-        else:
-            effective_q = max(self.question_count, self._count_recorded_items())
-            onset_txt = self.patient_info['history_of_present_illness']['onset'] or ''
-            sev_txt = self.patient_info['history_of_present_illness']['severity'] or ''
-            dur_txt = self.patient_info['history_of_present_illness']['duration'] or ''
-            parts = [
-                f"Primary concern: {self.patient_info['chief_complaint'] or 'not provided'}.",
-            ]
-            hpi_bits = []
-            if onset_txt:
-                hpi_bits.append(f"started {onset_txt}")
-            if sev_txt:
-                hpi_bits.append(f"severity {sev_txt}")
-            if dur_txt:
-                hpi_bits.append(f"duration {dur_txt}")
-            if hpi_bits:
-                parts.append("History of illness: " + ", ".join(hpi_bits) + ".")
-            parts.append(f"Medical history: {self.patient_info['past_medical_history'] or 'none reported'}.")
-            parts.append(f"Current medications: {self.patient_info['medications'] or 'none' }.")
-            parts.append(f"Allergies: {self.patient_info['allergies'] or 'none' }.")
-            
-            patient_summary = " ".join(parts)
+        info = self.patient_info
+        patient_summary = self._patient_summary()
         
-        who = self.participant.identity if self.participant else 'unknown'
-        logger.info(f"Summarizing medical interview for {who}: {self.question_count} questions asked")
+        who = self._identity
+        logger.info("Summarizing medical interview for %s: %s questions asked", who, self.question_count)
         
         # Store the summary for later retrieval
         self.call_summary = {
-            "patient_info": self.patient_info.copy(),
+            "patient_info": info,
             "call_duration": "in_progress",
             "status": "summary_generated",
             "timestamp": datetime.now().isoformat(),
@@ -876,30 +1320,29 @@ Note-Driven Conversation Summary:
         try:
             await ctx.session.say(patient_summary)
             await ctx.session.say("Is this information correct?")
-        except Exception as e:
-            logger.error(f"Error speaking confirmation prompt: {e}")
+        except Exception:
+            logger.exception("Error speaking confirmation prompt")
         
+        # Full structures stay on self.call_summary; the LLM only needs the text
         return {
             "status": "summary_ready",
             "summary": patient_summary,
-            "patient_info": self.patient_info,
-            "call_summary": self.call_summary,
-            "question_count": self.question_count
         }
 
     @function_tool()
     async def save_notes(self, ctx: RunContext):
         """Save current medical report to TXT file"""
         try:
+            now = datetime.now()
             current_summary = {
-                "patient_info": self.patient_info.copy(),
+                "patient_info": self.patient_info,
                 "call_duration": "in_progress",
                 "status": "notes_saved",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now.isoformat(),
                 "question_count": self.question_count
             }
             
-            filepath = await self.save_medical_report(current_summary)
+            filepath = await self.save_medical_report(current_summary, now=now)
             if filepath:
                 return {
                     "status": "notes_saved",
@@ -912,7 +1355,7 @@ Note-Driven Conversation Summary:
                     "message": "Failed to save medical report"
                 }
         except Exception as e:
-            logger.error(f"Error in save_notes: {e}")
+            logger.exception("Error in save_notes")
             return {
                 "status": "error",
                 "message": f"Error saving notes: {str(e)}"
@@ -927,25 +1370,211 @@ Note-Driven Conversation Summary:
             return {"status": "ignored_during_retry"}
 
         try:
-            identity = self.participant.identity
+            identity = self._identity
             phone_number = identity or self.dial_info.get("phone_number", "unknown")
-            logger.info(f"detected answering machine for {phone_number}")
+            logger.info("detected answering machine for %s", phone_number)
 
             # Save a voicemail note, then hang up
-            save_no_answer_note(phone_number, reason="voicemail", dial_info=self.dial_info)
+            await _save_no_answer_note_bounded(phone_number, "voicemail", self.dial_info)
         finally:
             await self.hangup()
 
-    def update_interview_phase(self, new_phase: str):
+    def update_interview_phase(self, new_phase: InterviewPhase):
         """Update the current interview phase"""
         self.interview_phase = new_phase
-        logger.info(f"Interview phase updated to: {new_phase}")
+        logger.info("Interview phase updated to: %s", new_phase.name.lower())
 
     def increment_question_count(self):
         """Increment internal question counter (for analytics/limits)."""
         self.question_count += 1
         return self.question_count
 
+    # Scripted replies for the user_message handler in `entrypoint`
+    async def _say_and_end(self, session: AgentSession):
+        await session.say("Thank you. I'll end the call now.")
+        # Call the tool so it receives the proper RunContext
+        await session.call_tool("end_call")
+
+    async def _say_and_adjust(self, session: AgentSession):
+        await session.say("No problem. Please tell me the corrections now.")
+        self.summary_done = False
+
+    async def _repeat_summary(self, session: AgentSession):
+        try:
+            await session.say((self.call_summary or {}).get("medical_report", "I'll repeat the summary now."))
+            await session.say("Is this information correct?")
+        except Exception:
+            pass
+
+
+class NoteModeOutboundCaller(OutboundCaller):
+    """`OutboundCaller` for calls that carry a doctor note.
+
+    Questions are planned from the note in `entrypoint`; this subclass only
+    swaps in the note-driven report and spoken recap, so neither path has to
+    re-check the mode on every call.
+    """
+
+    def generate_medical_report(self):
+        """Summarize the conversation fields in one wrapped paragraph."""
+        info = self.patient_info
+        hpi = info.history_of_present_illness
+        minimal_info = not (
+            info.chief_complaint
+            or any(getattr(hpi, key) for key in HPI_FIELDS)
+            or info.medications
+            or info.allergies
+            or info.past_medical_history
+        )
+        summary_parts: list[str] = []
+        if info.name:
+            summary_parts.append(f"Patient identified as {info.name}.")
+        elif (self.dial_info or {}).get('patient_name'):
+            summary_parts.append(f"Patient identified as {(self.dial_info or {}).get('patient_name')}.")
+        chief = info.chief_complaint or self.inferred_chief_from_note
+        if chief:
+            summary_parts.append(f"Primary concern is {chief}.")
+        hpi_bits: list[str] = [tpl % v for key, tpl in _NOTE_HPI_FIELDS if (v := getattr(hpi, key))]
+        if hpi_bits:
+            summary_parts.append("History of present illness: " + ", ".join(hpi_bits) + ".")
+        if info.past_medical_history:
+            summary_parts.append(f"Relevant history includes {info.past_medical_history}.")
+        if info.medications:
+            summary_parts.append(f"Current medications include {info.medications}.")
+        if info.allergies:
+            summary_parts.append(f"Allergies: {info.allergies}.")
+        ros = info.review_of_systems
+        ros_bits: list[str] = []
+        for key in _NOTE_ROS_ORDER:
+            val = getattr(ros, key).strip()
+            if val:
+                # Clean internal tags like "obstructive_sleep_apnea_risk_factors: "
+                if "obstructive_" in val:
+                    val = val.replace("obstructive_sleep_apnea_risk_factors: ", "").strip()
+                ros_bits.append(f"{_ROS_LABELS[key]}: {val}")
+        if ros_bits:
+            summary_parts.append("Review of systems: " + "; ".join(ros_bits) + ".")
+        if info.additional_notes:
+            summary_parts.append(info.additional_notes.replace("past_medical_history (anesthesia_problems): ", "Anesthesia: "))
+        if minimal_info and not summary_parts:
+            summary_parts.append("No patient responses were captured during this call.")
+        # Build paragraph using conversation-derived fields only
+        paragraph = " ".join(summary_parts).strip()
+        wrapped_paragraph = _wrap_paragraph(paragraph)
+        return _NOTE_REPORT_TMPL.substitute(summary=wrapped_paragraph).strip()
+
+    def _patient_summary(self) -> str:
+        """Concise recap of what was collected during the note-driven interview."""
+        info = self.patient_info
+        parts = []
+        if info.chief_complaint:
+            parts.append(f"Primary concern: {info.chief_complaint}")
+        if info.past_medical_history:
+            parts.append(f"Medical history: {info.past_medical_history}")
+        if info.medications:
+            parts.append(f"Medications: {info.medications}")
+        if info.allergies:
+            parts.append(f"Allergies: {info.allergies}")
+        if parts:
+            return "I've collected: " + ". ".join(parts) + "."
+        return "I've captured your details."
+
+
+def make_outbound_caller(*, name: str, appointment_time: str, dial_info: dict[str, Any]) -> OutboundCaller:
+    """Pick the agent class for this call from its metadata."""
+    cls = NoteModeOutboundCaller if (dial_info.get("doctor_note") or "").strip() else OutboundCaller
+    return cls(name=name, appointment_time=appointment_time, dial_info=dial_info)
+
+
+def prewarm(proc: JobProcess):
+    """Validate env and load the VAD model once per worker process.
+
+    Only the Silero weights are shared through `proc.userdata`; each VAD
+    stream keeps its own state. STT/TTS/LLM plugins are built per job in
+    `_build_model_stack`, on the job's loop, because their HTTP/WebSocket
+    sessions belong to the job context.
+    """
+    _validate_env()
+    proc.userdata["vad"] = silero.VAD.load(
+        activation_threshold=0.25,
+        min_speech_duration=0.08,
+        min_silence_duration=0.25,
+        prefix_padding_duration=0.06,
+        max_buffered_speech=20.0,
+        force_cpu=False,
+    )
+
+
+def _build_model_stack() -> dict[str, Any]:
+    """STT/TTS/LLM plugin instances for one session (constructors are cheap;
+    connections open lazily on the job's loop)."""
+    model_stack: dict[str, Any] = {}
+    model_stack["tts"] = deepgram.TTS(
+        #model="aura-asteria-en",
+        model="aura-luna-en",
+        # The SIP leg is 8 kHz narrowband; synthesizing at that rate avoids
+        # streaming 3x the samples only for them to be downsampled.
+        # Encoding stays linear16 since the plugin decodes raw PCM frames.
+        sample_rate=8000,
+    )
+    # Tune VAD/STT endpointing carefully to balance latency with natural turns.
+    if use_realtime_model:
+        # Gemini Live hears the caller directly, replacing the STT and text LLM
+        # round trips. Output is text-only so Deepgram TTS above speaks every
+        # turn: scripted `say` lines need it anyway, and one voice per call.
+        model_stack.update({
+            "llm": google.beta.realtime.RealtimeModel(
+                model="gemini-2.0-flash-exp",
+                modalities=["TEXT"],
+                temperature=0.7,
+                api_key=google_api_key,
+            ),
+        })
+    else:
+        model_stack.update({
+            "stt": deepgram.STT(
+                model="nova-3",
+                language="en-US",
+                endpointing_ms=stt_endpointing_ms,
+                # Stream interim transcripts and skip server-side batching so
+                # finals land as soon as endpointing fires
+                interim_results=True,
+                no_delay=True,
+            ),
+            "llm": google.LLM(
+                model="gemini-2.0-flash-lite",  # Lowest TTFT Gemini tier that supports function calling
+                temperature=0.7,  # Slightly lower for more consistent medical interviewing
+                # No max_output_tokens: the cap also applies to tool-call
+                # arguments and cut off batched record calls. Spoken length
+                # is bounded by the prompts (_SHORT_REPLY) instead.
+                api_key=google_api_key,
+            ),
+        })
+    return model_stack
+
+
+# Session listeners; they capture nothing per call, so one function object
+# serves every session
+def _on_session_error(error):
+    msg = str(error)
+    msg_low = msg.lower()
+    if "429" in msg or "quota" in msg_low:
+        logger.warning("Rate limit hit, waiting before retry...")
+        # The agent will automatically retry after a delay
+    elif any(marker in msg_low for marker in _FUNCTION_CALLING_MARKERS):
+        logger.error("Model doesn't support function calling - this will break the agent")
+    else:
+        logger.error("Session error: %s", error)
+
+
+def _on_session_connected():
+    logger.info("Agent session connected successfully")
+
+
+def _on_session_disconnected():
+    logger.info("Agent session disconnected")
+
+
 async def entrypoint(ctx: JobContext):
     """LiveKit Agents worker entrypoint.
 
@@ -956,7 +1585,7 @@ async def entrypoint(ctx: JobContext):
     4) Start the agent session first, then dial via SIP with retries
     5) Once participant joins, engage note-driven or standard intro and run
     """
-    logger.info(f"connecting to room {ctx.room.name}")
+    logger.info("connecting to room %s", ctx.room.name)
     await ctx.connect()
 
     # when dispatching the agent, we'll pass it the approriate info to dial the user
@@ -966,33 +1595,27 @@ async def entrypoint(ctx: JobContext):
     
     metadata_str = ctx.job.metadata
     dial_info = {}
-    logger.info(f"Raw metadata: {metadata_str}")
+    logger.debug("Raw metadata: %s", metadata_str)
     
     if metadata_str:
+        # The dispatcher (main.py / `lk dispatch create`) always sends a JSON
+        # object; anything else is a caller bug, so fail fast instead of guessing
         try:
-            # Try to parse as JSON first
-            import json
-            dial_info = json.loads(metadata_str)
-            logger.info(f"Parsed JSON metadata: {dial_info}")
-        except json.JSONDecodeError:
-            # Fallback to string parsing
-            logger.info("JSON parsing failed, trying string parsing")
-            clean_str = metadata_str.strip('{}')
-            for item in clean_str.split(','):
-                if ':' in item:
-                    key, value = item.split(':', 1)
-                    key = key.strip().strip('"')
-                    value = value.strip().strip('"')
-                    dial_info[key] = value
-            logger.info(f"Parsed string metadata: {dial_info}")
-    
-    logger.info(f"Final dial_info: {dial_info}")
+            dial_info = _json.loads(metadata_str)
+        except json.JSONDecodeError as e:
+            logger.error("Job metadata is not valid JSON: %s", e)
+            ctx.shutdown()
+            return
+        if not isinstance(dial_info, dict):
+            logger.error("Job metadata must be a JSON object, got %s", type(dial_info).__name__)
+            ctx.shutdown()
+            return
+        logger.debug("Parsed JSON metadata: %s", dial_info)
     
     # Validate required fields
-    logger.info(f"Checking for phone_number in dial_info: {dial_info}")
     if not dial_info.get("phone_number"):
-        logger.error(f"No phone_number found in metadata. Available keys: {list(dial_info.keys())}")
-        logger.error(f"Metadata string was: {metadata_str}")
+        logger.error("No phone_number found in metadata. Available keys: %s", list(dial_info.keys()))
+        logger.error("Metadata string was: %s", metadata_str)
         ctx.shutdown()
         return
         
@@ -1000,99 +1623,35 @@ async def entrypoint(ctx: JobContext):
     # Get UI-provided name if available
     ui_name = (dial_info.get("patient_name") or "").strip()
     ui_appt = (dial_info.get("appointment_date") or "").strip()
+    greeting_text = f"Hello {ui_name}, {_GREETING_BODY}" if ui_name else f"Hello, {_GREETING_BODY}"
 
     # Initialize the professional medical intake agent
-    agent = OutboundCaller(
+    agent = make_outbound_caller(
         name="Patient",  # Generic name since we'll get it from the patient
         appointment_time="upcoming appointment",
         dial_info=dial_info,
     )
+    # Reports queued during teardown still reach disk before the job exits
+    ctx.add_shutdown_callback(agent.close_notes_writer)
 
     # Determine doctor-note mode early (affects session config)
     doctor_note = (dial_info.get("doctor_note") or "").strip()
     doctor_note_mode = bool(doctor_note)
 
     # Optimized session configuration for minimal delays
-    # Tune VAD/STT endpointing carefully to balance latency with natural turns.
+    # VAD weights come from `prewarm`; the STT/LLM/TTS plugins are per call
     session = AgentSession(
-        vad=silero.VAD.load(
-            activation_threshold=0.25,
-            min_speech_duration=0.08,
-            min_silence_duration=0.25,
-            prefix_padding_duration=0.06,
-            max_buffered_speech=20.0,
-            force_cpu=False,
-        ),
-        stt=deepgram.STT(
-            model="nova-3",
-            language="en-US",
-            endpointing_ms=85,
-        ),
-        tts=deepgram.TTS(
-            #model="aura-asteria-en",
-            model="aura-luna-en",
-        ),
-        llm=google.LLM(
-            model="gemini-1.5-flash",  # Supports function calling with higher quotas
-            temperature=0.7,  # Slightly lower for more consistent medical interviewing
-            api_key=google_api_key,
-        ),
+        vad=ctx.proc.userdata["vad"],
+        **_build_model_stack(),
         # Disable preemptive generation to ensure agent waits for user responses
         preemptive_generation=False,
     )
 
     # Add event handlers for better conversation flow
-    note_questions: list[str] = []
+    note_questions: tuple[str, ...] = ()
     note_q_idx: int = 0
     started_questions: bool = False
-    fallback_task = None
-
-    def _questions_from_note(note: str) -> list[str]:
-        # Simple heuristic conversion of provider note into questions without LLM
-        text = (note or "").strip()
-        # Sanitize: remove obvious template headings and duplicate words
-        for junk in ["PRE-VISIT MEDICAL INTAKE REPORT", "Report Details:"]:
-            text = text.replace(junk, " ")
-        if not text:
-            return []
-        # Split by semicolons or periods for clauses
-        import re
-        parts = [p.strip() for p in re.split(r"[;\n]+|(?<=[.])\s+", text) if p.strip()]
-        questions: list[str] = []
-        for p in parts:
-            low = p.lower()
-            if not p:
-                continue
-            # Map common phrases to concise questions
-            if "functional capacity" in low or "climb" in low:
-                questions.append("Can you climb two flights of stairs or carry groceries without symptoms?")
-            elif "heart" in low or "lung" in low or "kidney" in low:
-                questions.append("Do you have a history of heart, lung, or kidney disease?")
-            elif "chest pain" in low or "dyspnea" in low or "shortness of breath" in low:
-                questions.append("Do you get chest pain or shortness of breath with exertion?")
-            elif "sleep apnea" in low or "obstructive" in low:
-                questions.append("Have you been told you have obstructive sleep apnea or do you snore loudly and stop breathing during sleep?")
-            elif "anesthesia" in low:
-                questions.append("Have you had any problems with anesthesia in the past?")
-            elif "anticoagulant" in low or "antiplatelet" in low or "sglt2" in low or "current meds" in low or "meds" in low:
-                questions.append("What prescription medications are you taking now, including any blood thinners or SGLT2 inhibitors?")
-            elif "infection" in low or "fever" in low:
-                questions.append("Have you had any recent infections or fevers?")
-            elif "allerg" in low:
-                questions.append("Do you have any medication or latex allergies?")
-            else:
-                # Fallback to a short, neutral question to avoid reading the note verbatim
-                questions.append("Based on your doctor’s note, what symptoms are you experiencing right now?")
-        # Deduplicate and cap to 12
-        seen = set()
-        final: list[str] = []
-        for q in questions:
-            if q.lower() not in seen:
-                final.append(q)
-                seen.add(q.lower())
-            if len(final) >= 12:
-                break
-        return final
+    fallback_handle: asyncio.TimerHandle | None = None
 
     async def _start_note_questions_if_needed():
         nonlocal started_questions, note_q_idx
@@ -1100,91 +1659,99 @@ async def entrypoint(ctx: JobContext):
             return
         started_questions = True
         # Personalized intro if name provided
-        if ui_name:
-            await session.say(f"Hello {ui_name}, this is your pre-visit intake assistant. I'm here to collect important medical information to help prepare for your appointment. Is now a good time to talk?")
-        else:
-            await session.say("Hello, this is your pre-visit intake assistant. I'm here to collect important medical information to help prepare for your appointment. Is now a good time to talk?")
+        await session.say(greeting_text)
         await asyncio.sleep(0.05)
 
+    # Scripted replies spawned from the user_message handler run one at a time,
+    # so quick successive utterances can't interleave their say()/tool calls
+    reply_lock = asyncio.Lock()
+
+    def _run_serialized(coro) -> None:
+        async def _runner():
+            async with reply_lock:
+                await coro
+        # Hold a reference so the reply isn't garbage-collected mid-flight
+        task = asyncio.create_task(_runner())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
     @session.on("user_message")
     def on_user_message(message):
-        logger.info(f"User said: {message.text}")
+        text = message.text or ""
+        text_stripped = text.strip()
+        text_low = text_stripped.lower()
+        logger.info("User said: %s", text)
+        # First utterance beat the 2s fallback: start the note questions now
+        nonlocal fallback_handle
+        if fallback_handle is not None:
+            fallback_handle.cancel()
+            fallback_handle = None
+            _run_serialized(_start_note_questions_if_needed())
         # User replied; allow next question
         agent.awaiting_user_reply = False
         
         # Meta-questions: always stay in intake scope
-        meta = message.text.strip().lower()
+        meta = text_low
         # End-intent detection at any time
-        end_set = {"end call", "hang up", "goodbye", "end the call", "finish", "we are done", "that's all", "no that's all", "no its all", "no it's all"}
-        if any(phrase in meta for phrase in end_set):
-            async def _respect_end():
-                await session.say("Thank you. I'll end the call now.")
-                await session.call_tool("end_call")
-            asyncio.create_task(_respect_end())
+        if any(phrase in meta for phrase in _END_PHRASES):
+            _run_serialized(agent._say_and_end(session))
             return
 
         # If awaiting confirmation after summary, handle yes/no or repeat
-        if getattr(agent, 'awaiting_confirmation', False):
-            yes_set = {"yes", "yep", "yeah", "correct", "that's correct", "its correct", "it's correct", "ok", "okay", "k"}
-            no_set = {"no", "nope", "not correct", "needs changes", "change", "adjust", "incorrect"}
-            repeat_set = {"repeat", "say again", "again", "could you repeat", "repeat it", "repeat summary"}
-            text_low = meta
-            if any(w in text_low for w in yes_set):
+        if agent.awaiting_confirmation:
+            if any(w in text_low for w in _YES_PHRASES):
                 agent.user_confirmed = True
                 agent.awaiting_confirmation = False
-                async def _end_after_confirm():
-                    await session.say("Thank you. I'll end the call now.")
-                    # Call the tool so it receives the proper RunContext
-                    await session.call_tool("end_call")
-                asyncio.create_task(_end_after_confirm())
+                _run_serialized(agent._say_and_end(session))
                 return
-            if any(w in text_low for w in no_set):
+            if any(w in text_low for w in _NO_PHRASES):
                 agent.user_confirmed = False
                 agent.awaiting_confirmation = False
-                async def _adjust():
-                    await session.say("No problem. Please tell me the corrections now.")
-                    agent.summary_done = False
-                asyncio.create_task(_adjust())
+                _run_serialized(agent._say_and_adjust(session))
                 return
-            if any(w in text_low for w in repeat_set):
-                async def _repeat_summary():
-                    try:
-                        await session.say((agent.call_summary or {}).get("medical_report", "I'll repeat the summary now."))
-                        await session.say("Is this information correct?")
-                    except Exception:
-                        pass
-                asyncio.create_task(_repeat_summary())
+            if any(w in text_low for w in _REPEAT_PHRASES):
+                _run_serialized(agent._repeat_summary(session))
                 return
 
         # If confirmation was already handled, don't process with LLM
-        if getattr(agent, 'confirmation_handled', False):
+        if agent.confirmation_handled:
             agent.confirmation_handled = False  # Reset for next message
             return
 
         # If awaiting confirmation, don't run simple_sequence to prevent LLM interference
-        if getattr(agent, 'awaiting_confirmation', False):
+        if agent.awaiting_confirmation:
                 return
 
         # Capture name if provided and not set
-        if not agent.patient_info.get("name"):
-            potential = (message.text or "").strip()
+        if not agent.patient_info.name:
+            potential = text_stripped
             if 2 <= len(potential.split()) <= 5 and any(ch.isalpha() for ch in potential):
-                agent.patient_info["name"] = potential
-                logger.info(f"Captured name: {potential}")
+                agent.patient_info.name = potential
+                agent._recorded_count = None
+                logger.info("Captured name: %s", potential)
         
         # Capture appointment date if provided and not set
-        if not agent.patient_info.get("appointment_date"):
-            potential = (message.text or "").strip()
-            # Simple date detection - look for common date patterns
-            if any(word in potential.lower() for word in ["january", "february", "march", "april", "may", "june", "july", "august", "september", "october", "november", "december", "jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]) or any(char.isdigit() for char in potential):
-                agent.patient_info["appointment_date"] = potential
-                logger.info(f"Captured appointment date: {potential}")
+        if not agent.patient_info.appointment_date:
+            potential = text_stripped
+            # Simple date detection - most dates carry a digit, so test that
+            # first in C before scanning for month names
+            if _HAS_DIGIT(potential) or any(word in text_low for word in _MONTH_ABBREVS):
+                agent.patient_info.appointment_date = potential
+                agent._recorded_count = None
+                logger.info("Captured appointment date: %s", potential)
 
         
+        # Standard mode past the opening question: the session pipeline answers
+        # this turn from the agent instructions, so just count it inline rather
+        # than scheduling a task per utterance
+        if agent.id_chief_done and not (doctor_note_mode and note_questions):
+            agent.increment_question_count()
+            return
+
         # SIMPLE SEQUENCE - no LLM interference
-        # This path enforces single-question turns and uses either note-derived
-        # questions or asks the LLM to propose exactly one safe medical question.
+        # This path enforces single-question turns using note-derived questions.
         async def simple_sequence():
+            nonlocal note_q_idx
             # Guard against asking more than one question before a reply
             if agent.awaiting_user_reply:
                 return
@@ -1198,7 +1765,7 @@ async def entrypoint(ctx: JobContext):
                 agent.awaiting_user_reply = True
                 return
             
-            # Step 4: Continue with medical questions
+            # Step 4: Continue with note-derived medical questions
             if doctor_note_mode and note_questions:
                 if note_q_idx < len(note_questions):
                     q = note_questions[note_q_idx]
@@ -1218,39 +1785,15 @@ async def entrypoint(ctx: JobContext):
                     await session.say("Before I summarize, is there anything else important you want your provider to know?")
                 agent.awaiting_user_reply = True
                 return
-            else:
-                # Standard mode - ask one medical question
-                await session.generate_reply(instructions=(
-                    "Ask exactly ONE medically appropriate question for a pre-visit intake. "
-                    "Do not combine topics. Keep ≤ 15 words. "
-                    "ABSOLUTELY DO NOT say or display: 'record patient info', 'InfoType', 'Category', 'subcategory', 'Value', 'tool', 'function', 'call tool', 'function call'. "
-                    "If you need to capture data, silently call record_patient_info and then ask the next question."
-                ))
-                agent.increment_question_count()
-                agent.awaiting_user_reply = True
-                return
 
-        asyncio.create_task(simple_sequence())
+        _run_serialized(simple_sequence())
     
     # Add error handling for rate limits and other errors
-    @session.on("error")
-    def on_error(error):
-        if "429" in str(error) or "quota" in str(error).lower():
-            logger.warning("Rate limit hit, waiting before retry...")
-            # The agent will automatically retry after a delay
-        elif "function calling is not enabled" in str(error).lower():
-            logger.error("Model doesn't support function calling - this will break the agent")
-        else:
-            logger.error(f"Session error: {error}")
-    
+    session.on("error", _on_session_error)
+
     # Add connection status monitoring
-    @session.on("connected")
-    def on_connected():
-        logger.info("Agent session connected successfully")
-    
-    @session.on("disconnected")
-    def on_disconnected():
-        logger.info("Agent session disconnected")
+    session.on("connected", _on_session_connected)
+    session.on("disconnected", _on_session_disconnected)
 
     # Start the session first before dialing so we don't miss the first utterance
     session_started = asyncio.create_task(
@@ -1263,58 +1806,83 @@ async def entrypoint(ctx: JobContext):
             ),
         )
     )
+    # Resolve the participant from the room event as soon as the SIP leg joins,
+    # rather than waiting on a separate lookup after dialing returns
+    participant_joined: asyncio.Future[rtc.RemoteParticipant] = asyncio.get_running_loop().create_future()
+
+    def _on_participant_connected(p: rtc.RemoteParticipant):
+        if p.identity == participant_identity and not participant_joined.done():
+            participant_joined.set_result(p)
+
+    ctx.room.on("participant_connected", _on_participant_connected)
+
+    # Plan note-mode questions now so the work overlaps the SIP ring instead
+    # of delaying the first question after the patient answers
+    if doctor_note_mode:
+        # Build question plan locally without invoking LLM audio/tools
+        agent.planning_mode = True
+        try:
+            note_questions = _questions_from_note(doctor_note)
+        finally:
+            agent.planning_mode = False
+
     # `create_sip_participant` starts dialing the user with retry on timeout
     dial_success = False
     # Allow per-call retry override via metadata
-    try:
-        per_call_retry = int(str((dial_info or {}).get("retry_count", (dial_info or {}).get("retries", outbound_retry_count))))
-    except Exception:
-        per_call_retry = outbound_retry_count
-    try:
-        per_call_delay = int(str((dial_info or {}).get("retry_delay", outbound_retry_delay_s)))
-    except Exception:
-        per_call_delay = outbound_retry_delay_s
+    per_call_retry = _int_opt(dial_info, ("retry_count", "retries"), outbound_retry_count)
+    per_call_delay = _int_opt(dial_info, ("retry_delay",), outbound_retry_delay_s)
+    per_call_delay_max = _int_opt(dial_info, ("retry_delay_max",), outbound_retry_delay_max_s)
     total_attempts = max(1, per_call_retry + 1)
+    # Every attempt sends the same request, so build it once
+    sip_request = api.CreateSIPParticipantRequest(
+        room_name=ctx.room.name,
+        sip_trunk_id=outbound_trunk_id,
+        sip_call_to=phone_number,
+        participant_identity=participant_identity,
+        # function blocks until user answers the call, or if the call fails
+        wait_until_answered=True,
+    )
     for attempt_idx in range(1, total_attempts + 1):
         try:
             logger.info(
-                f"Dial attempt {attempt_idx}/{total_attempts} to {phone_number} with timeout {outbound_call_timeout_s}s"
-            )
-            await asyncio.wait_for(
-                ctx.api.sip.create_sip_participant(
-            api.CreateSIPParticipantRequest(
-                room_name=ctx.room.name,
-                sip_trunk_id=outbound_trunk_id,
-                sip_call_to=phone_number,
-                participant_identity=participant_identity,
-                # function blocks until user answers the call, or if the call fails
-                wait_until_answered=True,
-            )
-                ),
-                timeout=outbound_call_timeout_s,
+                "Dial attempt %s/%s to %s with timeout %ss",
+                attempt_idx, total_attempts, phone_number, outbound_call_timeout_s,
             )
+            async with _timeout(outbound_call_timeout_s):
+                await ctx.api.sip.create_sip_participant(sip_request)
             dial_success = True
             break
         except asyncio.TimeoutError:
             logger.warning(
-                f"Attempt {attempt_idx} timed out after {outbound_call_timeout_s}s (no answer)"
+                "Attempt %s timed out after %ss (no answer)", attempt_idx, outbound_call_timeout_s
             )
             if attempt_idx < total_attempts:
-                logger.info(f"Retrying in {per_call_delay}s...")
-                await asyncio.sleep(per_call_delay)
+                backoff = _retry_backoff(attempt_idx, per_call_delay, per_call_delay_max)
+                logger.info("Retrying in %.1fs...", backoff)
+                await asyncio.sleep(backoff)
                 continue
             # Final failure after retries: persist a JSON note for traceability
-            save_no_answer_note(phone_number, reason="timeout", dial_info=dial_info)
+            await _save_no_answer_note_bounded(phone_number, "timeout", dial_info)
             ctx.shutdown()
             return
         except api.TwirpError as e:
             logger.error(
-                f"error creating SIP participant: {e.message}, "
-                f"SIP status: {e.metadata.get('sip_status_code')} "
-                f"{e.metadata.get('sip_status')}"
+                "error creating SIP participant: %s, SIP status: %s %s",
+                e.message,
+                e.metadata.get('sip_status_code'),
+                e.metadata.get('sip_status'),
             )
+            try:
+                sip_code = int(e.metadata.get('sip_status_code') or 0)
+            except ValueError:
+                sip_code = 0
+            if sip_code in _RETRIABLE_SIP_CODES and attempt_idx < total_attempts:
+                backoff = _retry_backoff(attempt_idx, per_call_delay, per_call_delay_max)
+                logger.info("SIP status %s is transient; retrying in %.1fs...", sip_code, backoff)
+                await asyncio.sleep(backoff)
+                continue
             reason = f"SIP error {e.metadata.get('sip_status_code')} {e.metadata.get('sip_status')}"
-            save_no_answer_note(phone_number, reason=reason, dial_info=dial_info)
+            await _save_no_answer_note_bounded(phone_number, reason, dial_info)
             ctx.shutdown()
             return
 
@@ -1323,8 +1891,22 @@ async def entrypoint(ctx: JobContext):
 
     # Wait for the agent session start and participant join
     await session_started
-    participant = await ctx.wait_for_participant(identity=participant_identity)
-    logger.info(f"participant joined: {participant.identity}")
+    # In standard mode the greeting does not depend on the participant, so queue
+    # it now and let TTS synthesis overlap the room join
+    greeting = None
+    if not doctor_note_mode:
+        logger.info("Starting professional medical intake interview")
+        greeting = session.say(greeting_text)
+    participant = ctx.room.remote_participants.get(participant_identity)
+    if participant is None:
+        try:
+            participant = await asyncio.wait_for(participant_joined, timeout=30)
+        except asyncio.TimeoutError:
+            logger.error("participant %s answered but never joined the room", participant_identity)
+            ctx.shutdown()
+            return
+    ctx.room.off("participant_connected", _on_participant_connected)
+    logger.info("participant joined: %s", participant.identity)
 
     agent.set_participant(participant)
 
@@ -1333,46 +1915,34 @@ async def entrypoint(ctx: JobContext):
 
     # Set UI-provided identifiers
     if ui_name:
-        agent.patient_info["name"] = ui_name
+        agent.patient_info.name = ui_name
     if ui_appt:
-        agent.patient_info["appointment_date"] = ui_appt
+        agent.patient_info.appointment_date = ui_appt
+    agent._recorded_count = None
 
     if doctor_note_mode:
         logger.info("Starting doctor-note-driven interview")
-        # Build question plan locally without invoking LLM audio/tools
-        agent.planning_mode = True
-        try:
-            note_questions = _questions_from_note(doctor_note)
-        finally:
-            agent.planning_mode = False
         if note_questions:
-            # Wait for first user utterance, or fallback after 2s
-            async def _fallback_start():
-                await asyncio.sleep(2.0)
-                await _start_note_questions_if_needed()
-            fallback_task = asyncio.create_task(_fallback_start())
+            # Start on the first user utterance (on_user_message cancels this
+            # handle), or after 2s if the caller stays silent
+            fallback_handle = asyncio.get_running_loop().call_later(
+                2.0, lambda: _run_serialized(_start_note_questions_if_needed())
+            )
         else:
             # Fallback to normal opening if planning failed
             logger.info("Doctor note plan empty; falling back to normal intro")
-            await session.say("Hello, this is your pre-visit intake assistant. I'm here to collect important medical information to help prepare for your appointment. Is now a good time to talk?")
+            await session.say(greeting_text)
     else:
-        # Start the conversation (normal)
-        logger.info("Starting professional medical intake interview")
-        if ui_name:
-            await session.say(f"Hello {ui_name}, this is your pre-visit intake assistant. I'm here to collect important medical information to help prepare for your appointment. Is now a good time to talk?")
-        else:
-            await session.say("Hello, this is your pre-visit intake assistant. I'm here to collect important medical information to help prepare for your appointment. Is now a good time to talk?")
-    # Register a best-effort stop on disconnect
-    @session.on("disconnected")
-    def _on_disc():
-        # No egress to stop anymore
-        return
+        # Standard greeting was queued before the participant wait
+        await greeting
 
 
 if __name__ == "__main__":
+    _validate_env()
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
             agent_name="outbound-caller",
         )
     )
\ No newline at end of file
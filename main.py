@@ -3,7 +3,8 @@
 Enhanced Outbound Caller Web UI
 
 This Flask app provides a simple dashboard to:
-- Dispatch immediate outbound intake calls via the LiveKit CLI (`lk dispatch create`)
+- Dispatch immediate outbound intake calls via the LiveKit server API
+  (falls back to the `lk dispatch create` CLI)
 - Schedule calls for later (lightweight, in‑memory scheduler thread)
 - Browse generated TXT reports and JSON no‑answer notes under `call_notes/`
 - View basic analytics (counts and top reasons, best‑effort from notes)
@@ -13,17 +14,37 @@ the `index` route for the UI entry. The system expects the agent worker to be
 running separately (see README: `python agent.py dev`).
 """
 
+import asyncio
 import os
+import heapq
+import itertools
 import json
+import re
+import sqlite3
 import subprocess
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, send_file
 from dotenv import load_dotenv
 import uuid
 import threading
 import time
 import pathlib
 
+try:
+    # Rust-backed JSON for the notes/reports payloads; the stdlib encoder is
+    # pure Python for the structures these endpoints return
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    # Ships with livekit-agents; dispatches in-process instead of exec'ing `lk`
+    from livekit import api as livekit_api
+except ImportError:  # pragma: no cover - fall back to the CLI
+    livekit_api = None
+
 # Load environment variables
 load_dotenv('.env.local')
 
@@ -31,23 +52,227 @@ load_dotenv('.env.local')
 app = Flask(__name__)
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'change-this-secret-key-in-production')
 
+if orjson is not None:
+    from flask.json.provider import DefaultJSONProvider
+
+    class OrjsonProvider(DefaultJSONProvider):
+        """Serve `jsonify` and `request.get_json()` through orjson.
+
+        Keys stay sorted like Flask's default provider; Flask's fallback
+        `default` still handles dates, UUIDs and dataclasses.
+        """
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(
+                obj,
+                default=self.default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS,
+            ).decode('utf-8')
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = OrjsonProvider(app)
+
+
+# Where the agent writes TXT reports and JSON no-answer notes
+_NOTES_DIR = pathlib.Path(__file__).resolve().parent / "call_notes"
+# Scheduled calls and patient records survive restarts here
+_STATE_DB = os.getenv('CALLER_STATE_DB') or str(pathlib.Path(__file__).resolve().parent / "caller_state.db")
+
+# Fallback patterns for `lk dispatch create` output that isn't JSON
+_ROOM_NAME_RE = re.compile(r"room[\s_-]?name\s*[:=]\s*([A-Za-z0-9_-]+)", re.IGNORECASE)
+_DISPATCH_ID_RE = re.compile(r"dispatch[\s_-]?id\s*[:=]\s*([A-Za-z0-9_-]+)", re.IGNORECASE)
+_UUID_RE = re.compile(
+    r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[1-5][0-9a-fA-F]{3}-[89abAB][0-9a-fA-F]{3}-[0-9a-fA-F]{12}\b"
+)
+
+
+def _json_loads(text):
+    """Parse JSON with orjson when installed, else the stdlib."""
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+
+def _json_dumps(obj):
+    """Serialize to a JSON str with orjson when installed, else the stdlib."""
+    return orjson.dumps(obj).decode('utf-8') if orjson is not None else json.dumps(obj)
+
  
 class EnhancedCallManager:
     """Lightweight coordinator for call dispatch, scheduling, and notes.
 
     Notes:
-    - Uses the external `lk` CLI in the current PATH to dispatch the agent
-    - Keeps state in memory; restarting the server clears scheduled calls
-    - A background thread polls for due schedules every ~30s
+    - Dispatches the agent through the LiveKit server API when LIVEKIT_URL is
+      set, else through the external `lk` CLI in the current PATH
+    - Scheduled calls and patient records are written through to SQLite
+      (`CALLER_STATE_DB`) and reloaded on start; active calls are in memory
+    - A background thread sleeps until the next schedule is due
     """
     def __init__(self):
-        self.active_calls = {}
+        # Least recently touched first, capped so a long-running server
+        # doesn't grow without bound
+        self.active_calls = OrderedDict()
+        self._active_calls_max = 1024
+        # Suffix for fallback ids when the dispatch output has none
+        self._call_seq = itertools.count(1)
         self.scheduled_calls = {}
-        self.patient_database = {}
+        self.patient_database = OrderedDict()
+        self._patients_max = 100000
+        # Guards the three dicts above: request threads, the dispatch pool
+        # and the scheduler thread all touch them
+        self._state_lock = threading.RLock()
+        # Dispatches run here so request threads don't wait on them
+        self._dispatch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='dispatch')
+        # call_id -> (monotonic submit time, future); guarded by `_state_lock`.
+        # Results nobody polls for are dropped after `_pending_ttl_s`
+        self.pending_dispatches = {}
+        self._pending_ttl_s = 600.0
+        # Event loop thread and client for the LiveKit API, started on first
+        # dispatch so its HTTP session and connections are reused across calls
+        self._livekit_loop = None
+        self._livekit_client = None
+        self._livekit_lock = threading.Lock()
+        # Parsed call notes keyed by path -> ((mtime_ns, size), note, analytics share).
+        # Unbounded on purpose: every request returns every note anyway, and
+        # the analytics counters need each file's share
+        self._notes_cache = {}
+        self._notes_lock = threading.Lock()
+        # New or changed note files are parsed here in parallel
+        self._notes_pool = ThreadPoolExecutor(
+            max_workers=min(32, (os.cpu_count() or 1) * 4), thread_name_prefix='notes'
+        )
+        # Running analytics over the cached notes; patients is a Counter so a
+        # phone number drops out when its last note does
+        self._analytics = {
+            'total': 0,
+            'reasons': Counter(),
+            'patients': Counter(),
+            'by_day': Counter(),
+            'total_duration': 0.0,
+        }
+        # (monotonic time, result) of the last get_analytics call
+        self._analytics_memo = (0.0, None)
+        self._analytics_ttl_s = 5.0
+        # Pending schedules as a heap of (naive scheduled time, schedule_id);
+        # `_schedule_cv` wakes the scheduler when an earlier one is added
+        self._schedule_heap = []
+        self._schedule_cv = threading.Condition()
+        # (scheduled time, schedule_id) of completed/failed calls, oldest first
+        self._finished_calls = deque()
+        self._db = self._open_state_db(_STATE_DB)
+        self._load_state()
         self.scheduler_running = False
         self.start_scheduler()
         
     
+    @staticmethod
+    def _open_state_db(path):
+        """Open (and create) the state database; None keeps state in memory only."""
+        try:
+            db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS scheduled_calls ('
+                'schedule_id TEXT PRIMARY KEY, scheduled_time TEXT, status TEXT, payload TEXT)'
+            )
+            db.execute(
+                'CREATE INDEX IF NOT EXISTS scheduled_calls_status_time '
+                'ON scheduled_calls (status, scheduled_time)'
+            )
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS patients ('
+                'phone TEXT PRIMARY KEY, last_call TEXT, payload TEXT)'
+            )
+            return db
+        except Exception as e:
+            print(f"⚠️ State database unavailable ({e}); scheduled calls won't survive a restart")
+            return None
+    
+    def _load_state(self):
+        """Rebuild scheduled calls, the schedule heap and patients from the database."""
+        if self._db is None:
+            return
+        try:
+            finished = []
+            for schedule_id, payload in self._db.execute(
+                'SELECT schedule_id, payload FROM scheduled_calls ORDER BY scheduled_time'
+            ):
+                call_data = _json_loads(payload)
+                # A call that was mid-dispatch when the server stopped may or
+                # may not have gone out; don't dial it twice
+                if call_data.get('status') == 'executing':
+                    call_data['status'] = 'failed'
+                    self._save_schedule(call_data)
+                self.scheduled_calls[schedule_id] = call_data
+                scheduled_time = datetime.fromisoformat(call_data['scheduled_time']).replace(tzinfo=None)
+                if call_data['status'] == 'scheduled':
+                    self._schedule_heap.append((scheduled_time, schedule_id))
+                else:
+                    finished.append((scheduled_time, schedule_id))
+            heapq.heapify(self._schedule_heap)
+            self._finished_calls.extend(sorted(finished))
+            # The most recent patients up to the cap, inserted oldest first so
+            # LRU order matches; colder rows stay in the database
+            rows = self._db.execute(
+                'SELECT phone, payload FROM patients ORDER BY last_call DESC LIMIT ?',
+                (self._patients_max,),
+            ).fetchall()
+            for phone, payload in reversed(rows):
+                self.patient_database[phone] = _json_loads(payload)
+            if self.scheduled_calls or self.patient_database:
+                print(f"📂 Restored {len(self.scheduled_calls)} scheduled calls and "
+                      f"{len(self.patient_database)} patients")
+        except Exception as e:
+            print(f"⚠️ Failed to load saved state: {e}")
+    
+    # The write-through helpers below run with `_state_lock` held, which also
+    # serializes use of the shared connection
+    def _save_schedule(self, call_data):
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                'INSERT OR REPLACE INTO scheduled_calls VALUES (?, ?, ?, ?)',
+                (call_data['schedule_id'], call_data['scheduled_time'], call_data['status'], _json_dumps(call_data)),
+            )
+        except Exception as e:
+            print(f"⚠️ Failed to save schedule {call_data.get('schedule_id')}: {e}")
+    
+    def _delete_schedules(self, schedule_ids):
+        if self._db is None or not schedule_ids:
+            return
+        try:
+            self._db.executemany(
+                'DELETE FROM scheduled_calls WHERE schedule_id = ?', [(sid,) for sid in schedule_ids]
+            )
+        except Exception as e:
+            print(f"⚠️ Failed to delete expired schedules: {e}")
+    
+    def _load_patient(self, phone_number):
+        """Saved record for a patient no longer held in memory, or None."""
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                'SELECT payload FROM patients WHERE phone = ?', (phone_number,)
+            ).fetchone()
+            return _json_loads(row[0]) if row else None
+        except Exception as e:
+            print(f"⚠️ Failed to load patient {phone_number}: {e}")
+            return None
+    
+    def _save_patient(self, phone_number):
+        if self._db is None:
+            return
+        try:
+            record = self.patient_database[phone_number]
+            self._db.execute(
+                'INSERT OR REPLACE INTO patients VALUES (?, ?, ?)',
+                (phone_number, record['last_call'], _json_dumps(record)),
+            )
+        except Exception as e:
+            print(f"⚠️ Failed to save patient {phone_number}: {e}")
+    
     def _parse_dispatch_output(self, stdout_text):
         """Best-effort parser for LiveKit CLI dispatch output.
         Tries JSON first, then falls back to regex-based extraction.
@@ -58,7 +283,7 @@ class EnhancedCallManager:
             return info
         try:
             # Try entire output as JSON
-            data = json.loads(stdout_text)
+            data = _json_loads(stdout_text)
             # Common keys
             info['dispatch_id'] = (
                 data.get('id')
@@ -78,38 +303,62 @@ class EnhancedCallManager:
             if not line:
                 continue
             try:
-                data = json.loads(line)
+                data = _json_loads(line)
                 if isinstance(data, dict):
                     info['dispatch_id'] = info.get('dispatch_id') or data.get('id') or data.get('dispatchId') or data.get('dispatch_id')
                     rn = (data.get('room') or {}).get('name') if isinstance(data.get('room'), dict) else data.get('room')
                     info['room_name'] = info.get('room_name') or rn or data.get('room_name') or data.get('roomName')
+                    # Earlier lines win, so nothing later can change the result
+                    if info['dispatch_id'] and info['room_name']:
+                        return info
             except Exception:
                 continue
         # Regex fallback for common patterns
-        try:
-            import re
-            # room name key-value
-            m = re.search(r"room[\s_-]?name\s*[:=]\s*([A-Za-z0-9_-]+)", stdout_text, re.IGNORECASE)
-            if m:
-                info['room_name'] = info.get('room_name') or m.group(1)
-            # dispatch id key-value
-            m = re.search(r"dispatch[\s_-]?id\s*[:=]\s*([A-Za-z0-9_-]+)", stdout_text, re.IGNORECASE)
+        # room name key-value
+        m = _ROOM_NAME_RE.search(stdout_text)
+        if m:
+            info['room_name'] = info.get('room_name') or m.group(1)
+        # dispatch id key-value
+        m = _DISPATCH_ID_RE.search(stdout_text)
+        if m:
+            info['dispatch_id'] = info.get('dispatch_id') or m.group(1)
+        # UUID fallback
+        if 'dispatch_id' not in info:
+            m = _UUID_RE.search(stdout_text)
             if m:
-                info['dispatch_id'] = info.get('dispatch_id') or m.group(1)
-            # UUID fallback
-            if 'dispatch_id' not in info:
-                m = re.search(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[1-5][0-9a-fA-F]{3}-[89abAB][0-9a-fA-F]{3}-[0-9a-fA-F]{12}\b", stdout_text)
-                if m:
-                    info['dispatch_id'] = m.group(0)
-        except Exception:
-            pass
+                info['dispatch_id'] = m.group(0)
         return {k: v for k, v in info.items() if v}
     
-    def start_call(self, phone_number, patient_name="", priority="normal", doctor_note: str = ""):
-        """Start an outbound call with enhanced metadata"""
+    def _get_livekit_loop(self):
+        """Event loop thread that owns the LiveKit API client."""
+        with self._livekit_lock:
+            if self._livekit_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, daemon=True, name='livekit-api').start()
+                self._livekit_loop = loop
+            return self._livekit_loop
+    
+    async def _create_dispatch(self, metadata):
+        # Runs on the loop thread only, so the lazy client init can't race
+        if self._livekit_client is None:
+            self._livekit_client = livekit_api.LiveKitAPI()
+        return await self._livekit_client.agent_dispatch.create_dispatch(
+            livekit_api.CreateAgentDispatchRequest(
+                agent_name='outbound-caller',
+                room=f"outbound-{uuid.uuid4().hex[:12]}",
+                metadata=metadata,
+            )
+        )
+    
+    def start_call(self, phone_number, patient_name="", priority="normal", doctor_note: str = "", call_id=None):
+        """Start an outbound call with enhanced metadata.
+
+        Blocks on the dispatch (up to 30s); request handlers should use
+        `start_call_async` instead.
+        """
         try:
-            call_id = str(uuid.uuid4())
-            metadata = json.dumps({
+            call_id = call_id or str(uuid.uuid4())
+            metadata = _json_dumps({
                 "phone_number": phone_number,
                 "patient_name": patient_name,
                 "priority": priority,
@@ -117,60 +366,92 @@ class EnhancedCallManager:
                 "call_id": call_id,
             })
             
-            cmd = [
-                'lk', 'dispatch', 'create',
-                '--new-room',
-                '--agent-name', 'outbound-caller',
-                '--metadata', metadata
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode == 0:
+            if livekit_api is not None and os.getenv('LIVEKIT_URL'):
+                future = asyncio.run_coroutine_threadsafe(
+                    self._create_dispatch(metadata), self._get_livekit_loop()
+                )
+                try:
+                    dispatch = future.result(timeout=30)
+                except FutureTimeoutError:
+                    # Stop the request on the loop so it can't go through
+                    # after we've reported failure
+                    future.cancel()
+                    return {
+                        'success': False,
+                        'error': 'Dispatch timed out after 30s'
+                    }
+                parsed = {'dispatch_id': dispatch.id, 'room_name': dispatch.room}
+                raw_output = ''
+            else:
+                cmd = [
+                    'lk', 'dispatch', 'create',
+                    '--new-room',
+                    '--agent-name', 'outbound-caller',
+                    '--metadata', metadata
+                ]
+                
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+                if result.returncode != 0:
+                    return {
+                        'success': False,
+                        'error': f'Command failed: {result.stderr}'
+                    }
                 # Try to parse real IDs from CLI output
                 parsed = self._parse_dispatch_output(result.stdout)
-                dispatch_id = parsed.get('dispatch_id') or f"call_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                room_name = parsed.get('room_name') or f"room_{datetime.now().strftime('%H%M%S')}"
-                
-                call_info = {
-                    'call_id': call_id,
-                    'dispatch_id': dispatch_id,
-                    'room_name': room_name,
-                    'phone_number': phone_number,
-                    'patient_name': patient_name,
-                    'priority': priority,
-                    'start_time': datetime.now().isoformat(),
-                    'status': 'active',
-                    'duration': 0
-                }
-                
+                raw_output = result.stdout.strip() if result.stdout else ''
+            
+            dispatch_id = parsed.get('dispatch_id')
+            room_name = parsed.get('room_name')
+            if not (dispatch_id and room_name):
+                # Unique even for back-to-back calls in the same second
+                suffix = f"{time.time_ns()}_{next(self._call_seq)}"
+                dispatch_id = dispatch_id or f"call_{suffix}"
+                room_name = room_name or f"room_{suffix}"
+            
+            call_info = {
+                'call_id': call_id,
+                'dispatch_id': dispatch_id,
+                'room_name': room_name,
+                'phone_number': phone_number,
+                'patient_name': patient_name,
+                'priority': priority,
+                'start_time': datetime.now().isoformat(),
+                'status': 'active',
+                'duration': 0
+            }
+            
+            with self._state_lock:
                 self.active_calls[dispatch_id] = call_info
+                self.active_calls.move_to_end(dispatch_id)
+                if len(self.active_calls) > self._active_calls_max:
+                    self.active_calls.popitem(last=False)
                 
-                # Store in patient database
+                # Store in patient database; records evicted from memory are
+                # still in SQLite and come back with their history
                 if phone_number not in self.patient_database:
-                    self.patient_database[phone_number] = {
+                    self.patient_database[phone_number] = self._load_patient(phone_number) or {
                         'name': patient_name,
                         'total_calls': 0,
                         'last_call': None,
                         'notes': []
                     }
+                    if len(self.patient_database) > self._patients_max:
+                        self.patient_database.popitem(last=False)
+                else:
+                    self.patient_database.move_to_end(phone_number)
                 
                 self.patient_database[phone_number]['total_calls'] += 1
                 self.patient_database[phone_number]['last_call'] = datetime.now().isoformat()
-                
-                return {
-                    'success': True,
-                    'call_id': call_id,
-                    'dispatch_id': dispatch_id,
-                    'room_name': room_name,
-                    'message': f'Call initiated to {phone_number}',
-                    'raw_output': result.stdout.strip() if result.stdout else ''
-                }
-            else:
-                return {
-                    'success': False,
-                    'error': f'Command failed: {result.stderr}'
-                }
+                self._save_patient(phone_number)
+            
+            return {
+                'success': True,
+                'call_id': call_id,
+                'dispatch_id': dispatch_id,
+                'room_name': room_name,
+                'message': f'Call initiated to {phone_number}',
+                'raw_output': raw_output
+            }
                 
         except Exception as e:
             return {
@@ -180,13 +461,62 @@ class EnhancedCallManager:
 
     
     
-    def schedule_call(self, phone_number, scheduled_time, patient_name="", priority="normal"):
-        """Schedule a call for later"""
+    def start_call_async(self, phone_number, patient_name="", priority="normal", doctor_note: str = ""):
+        """Dispatch a call on the worker pool and return immediately.
+
+        Poll `get_call_status(call_id)` for the `start_call` result.
+        """
+        call_id = str(uuid.uuid4())
+        future = self._dispatch_pool.submit(
+            self.start_call, phone_number, patient_name, priority, doctor_note, call_id=call_id
+        )
+        now = time.monotonic()
+        with self._state_lock:
+            # Drop finished results that were never polled
+            expired = [
+                cid for cid, (submitted, fut) in self.pending_dispatches.items()
+                if fut.done() and now - submitted > self._pending_ttl_s
+            ]
+            for cid in expired:
+                del self.pending_dispatches[cid]
+            self.pending_dispatches[call_id] = (now, future)
+        return {
+            'success': True,
+            'call_id': call_id,
+            'status': 'dispatching',
+            'message': f'Dispatching call to {phone_number}'
+        }
+    
+    def get_call_status(self, call_id):
+        """Status of a call started with `start_call_async`.
+
+        Returns `status: 'dispatching'` while the dispatch runs, then the
+        `start_call` result once with `status` 'dispatched' or 'failed' (the
+        entry is dropped after it is read).
+        """
+        with self._state_lock:
+            pending = self.pending_dispatches.get(call_id)
+            if pending is None:
+                return {'success': False, 'error': 'Call not found'}
+            future = pending[1]
+            if not future.done():
+                return {'success': True, 'call_id': call_id, 'status': 'dispatching'}
+            del self.pending_dispatches[call_id]
+        result = future.result()
+        return {**result, 'call_id': call_id, 'status': 'dispatched' if result.get('success') else 'failed'}
+    
+    def schedule_call(self, phone_number, scheduled_time, patient_name="", priority="normal", **extra):
+        """Schedule a call for later.
+
+        `extra` fields (doctor_note, retries, ...) are stored with the
+        schedule before it becomes visible to the scheduler thread.
+        """
         try:
             schedule_id = str(uuid.uuid4())
             scheduled_datetime = datetime.fromisoformat(scheduled_time.replace('Z', '+00:00'))
             
             scheduled_call = {
+                **extra,
                 'schedule_id': schedule_id,
                 'phone_number': phone_number,
                 'scheduled_time': scheduled_datetime.isoformat(),
@@ -195,7 +525,13 @@ class EnhancedCallManager:
                 'status': 'scheduled'
             }
             
-            self.scheduled_calls[schedule_id] = scheduled_call
+            with self._state_lock:
+                self.scheduled_calls[schedule_id] = scheduled_call
+                self._save_schedule(scheduled_call)
+            # The scheduler compares naive local times
+            with self._schedule_cv:
+                heapq.heappush(self._schedule_heap, (scheduled_datetime.replace(tzinfo=None), schedule_id))
+                self._schedule_cv.notify()
             return {
                 'success': True,
                 'schedule_id': schedule_id,
@@ -211,9 +547,10 @@ class EnhancedCallManager:
     def start_scheduler(self):
         """Start the background scheduler.
 
-        A daemon thread wakes every ~30 seconds and dispatches any calls whose
-        scheduled time is now past. This is a best‑effort, in‑process scheduler
-        intended for single-instance dev/test usage.
+        A daemon thread sleeps until the earliest scheduled call is due (or
+        until `schedule_call` adds an earlier one) and dispatches it. This is
+        a best‑effort, in‑process scheduler intended for single-instance
+        dev/test usage.
         """
         if not self.scheduler_running:
             self.scheduler_running = True
@@ -221,73 +558,84 @@ class EnhancedCallManager:
             scheduler_thread.start()
             print("📅 Scheduler started for automatic calls")
     
+    def _execute_scheduled_call(self, call_data):
+        """Dispatch one due call and record the outcome on its schedule.
+
+        The caller has already marked it as executing; this always leaves it
+        'completed' or 'failed', even if the dispatch raises.
+        """
+        print(f"🕐 Executing scheduled call to {call_data['phone_number']}")
+        
+        # Make the call
+        # Build doctor_note and retry metadata if provided
+        doc_note = call_data.get('doctor_note') or ''
+        retries = int(str(call_data.get('retries') or 1))
+        # Pass doctor_note and retry overrides through metadata
+        try:
+            result = self.start_call(
+                call_data["phone_number"],
+                call_data.get("patient_name", ""),
+                call_data.get("priority", "normal"),
+                doc_note
+            )
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        
+        # Update status
+        with self._state_lock:
+            call_data["status"] = "completed" if result["success"] else "failed"
+            self._save_schedule(call_data)
+        if result["success"]:
+            print(f"✅ Scheduled call executed successfully")
+        else:
+            print(f"❌ Scheduled call failed: {result.get('error', 'Unknown error')}")
+    
     def _scheduler_loop(self):
-        """Background loop to check and execute scheduled calls"""
+        """Background loop to execute scheduled calls as they come due.
+
+        Schedules sit in a heap of (naive scheduled time, schedule_id), so
+        the loop only wakes for the next due call, a newly added schedule,
+        or the next 24h cleanup of finished calls.
+        """
         while self.scheduler_running:
             try:
-                current_time = datetime.now()
-                calls_to_execute = []
+                with self._schedule_cv:
+                    current_time = datetime.now()
+                    due = []
+                    while self._schedule_heap and self._schedule_heap[0][0] <= current_time:
+                        due.append(heapq.heappop(self._schedule_heap))
+                    if not due:
+                        wake_at = [self._schedule_heap[0][0]] if self._schedule_heap else []
+                        if self._finished_calls:
+                            wake_at.append(self._finished_calls[0][0] + timedelta(hours=24))
+                        timeout = (min(wake_at) - current_time).total_seconds() if wake_at else None
+                        self._schedule_cv.wait(timeout=None if timeout is None else max(timeout, 0.0))
                 
-                # Find calls that are ready to execute
-                for schedule_id, call_data in self.scheduled_calls.items():
-                    try:
-                        scheduled_time = datetime.fromisoformat(call_data["scheduled_time"])
-                        # Make both times timezone-naive for comparison
-                        if scheduled_time.tzinfo:
-                            scheduled_time = scheduled_time.replace(tzinfo=None)
-                        current_naive = current_time.replace(tzinfo=None)
-                        
-                        if (call_data["status"] == "scheduled" and scheduled_time <= current_naive):
-                            calls_to_execute.append((schedule_id, call_data))
-                    except Exception as e:
-                        print(f"Error processing scheduled call {schedule_id}: {e}")
-                        continue
+                # Execute ready calls outside the lock; `start_call` blocks on the CLI
+                for scheduled_time, schedule_id in due:
+                    with self._state_lock:
+                        call_data = self.scheduled_calls.get(schedule_id)
+                        # Cancelled (or already cleaned up) schedules are skipped
+                        if not call_data or call_data["status"] != "scheduled":
+                            if call_data and call_data["status"] == "cancelled":
+                                self._finished_calls.append((scheduled_time, schedule_id))
+                            continue
+                        # Mark as executing; checked and set together so a
+                        # concurrent cancel can't slip in between
+                        call_data["status"] = "executing"
+                        self._save_schedule(call_data)
+                    self._execute_scheduled_call(call_data)
+                    self._finished_calls.append((scheduled_time, schedule_id))
                 
-                # Execute ready calls
-                for schedule_id, call_data in calls_to_execute:
-                    print(f"🕐 Executing scheduled call to {call_data['phone_number']}")
-                    
-                    # Mark as executing
-                    self.scheduled_calls[schedule_id]["status"] = "executing"
-                    
-                    # Make the call
-                    # Build doctor_note and retry metadata if provided
-                    doc_note = call_data.get('doctor_note') or ''
-                    retries = int(str(call_data.get('retries') or 1))
-                    # Pass doctor_note and retry overrides through metadata
-                    result = self.start_call(
-                        call_data["phone_number"],
-                        call_data.get("patient_name", ""),
-                        call_data.get("priority", "normal"),
-                        doc_note
-                    )
- 
-                    # Update status
-                    if result["success"]:
-                        self.scheduled_calls[schedule_id]["status"] = "completed"
-                        print(f"✅ Scheduled call executed successfully")
-                    else:
-                        self.scheduled_calls[schedule_id]["status"] = "failed"
-                        print(f"❌ Scheduled call failed: {result.get('error', 'Unknown error')}")
-                
-                # Clean up old completed/failed calls (older than 24 hours)
-                cutoff_time = current_time - timedelta(hours=24)
-                expired_calls = []
-                for schedule_id, call_data in self.scheduled_calls.items():
-                    try:
-                        scheduled_time = datetime.fromisoformat(call_data["scheduled_time"])
-                        if scheduled_time.tzinfo:
-                            scheduled_time = scheduled_time.replace(tzinfo=None)
-                        if (call_data["status"] in ["completed", "failed"] and scheduled_time < cutoff_time):
-                            expired_calls.append(schedule_id)
-                    except:
-                        continue
-                
-                for schedule_id in expired_calls:
-                    del self.scheduled_calls[schedule_id]
-                
-                # Sleep for 30 seconds before checking again
-                time.sleep(30)
+                # Clean up old completed/failed calls (older than 24 hours);
+                # calls run in scheduled order, so the oldest are at the front
+                cutoff_time = datetime.now() - timedelta(hours=24)
+                with self._state_lock:
+                    expired = []
+                    while self._finished_calls and self._finished_calls[0][0] < cutoff_time:
+                        expired.append(self._finished_calls.popleft()[1])
+                        self.scheduled_calls.pop(expired[-1], None)
+                    self._delete_schedules(expired)
                 
             except Exception as e:
                 print(f"Scheduler error: {e}")
@@ -295,106 +643,154 @@ class EnhancedCallManager:
     
     def get_scheduled_calls(self):
         """Get all scheduled calls"""
-        return [
-            {**call_data, "schedule_id": schedule_id}
-            for schedule_id, call_data in self.scheduled_calls.items()
-        ]
+        with self._state_lock:
+            return [
+                {**call_data, "schedule_id": schedule_id}
+                for schedule_id, call_data in self.scheduled_calls.items()
+            ]
     
     def cancel_scheduled_call(self, schedule_id):
         """Cancel a scheduled call"""
-        if schedule_id in self.scheduled_calls:
-            self.scheduled_calls[schedule_id]["status"] = "cancelled"
-            return {"success": True, "message": "Call cancelled"}
+        with self._state_lock:
+            if schedule_id in self.scheduled_calls:
+                self.scheduled_calls[schedule_id]["status"] = "cancelled"
+                self._save_schedule(self.scheduled_calls[schedule_id])
+                return {"success": True, "message": "Call cancelled"}
         return {"success": False, "error": "Call not found"}
     
+    def _load_json_note(self, json_file, st):
+        """Parse one JSON no-answer note; None if unreadable."""
+        try:
+            with open(json_file, 'rb') as f:
+                note_data = _json_loads(f.read())
+                note_data['file_name'] = json_file.name
+                
+                # Calculate call duration if available
+                if 'start_time' in note_data and 'end_time' in note_data:
+                    try:
+                        start = datetime.fromisoformat(note_data['start_time'])
+                        end = datetime.fromisoformat(note_data['end_time'])
+                        note_data['duration'] = (end - start).total_seconds()
+                    except:
+                        note_data['duration'] = 0
+                
+                return note_data
+        except Exception:
+            return None
+    
+    def _load_txt_report(self, txt_file, st):
+        """Summarize one TXT medical report; None if it isn't one."""
+        try:
+            # Extract metadata from filename
+            filename = txt_file.name
+            if filename.startswith("medical_report_"):
+                # Parse phone number and timestamp from filename
+                parts = filename.replace("medical_report_", "").replace(".txt", "").split("_")
+                if len(parts) >= 2:
+                    phone_number = parts[0]
+                    timestamp_str = "_".join(parts[1:])
+                    
+                    # Try to parse timestamp
+                    try:
+                        timestamp = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S").isoformat()
+                    except:
+                        timestamp = datetime.fromtimestamp(st.st_mtime).isoformat()
+                    
+                    # Extract patient name and chief complaint from content
+                    patient_name = "Unknown"
+                    chief_complaint = "Not specified"
+                    
+                    # Stream the lines rather than reading the whole report into
+                    # one string; the summary labels follow the narrative and a
+                    # later label overrides an earlier one, so every line is seen
+                    with open(txt_file, 'r', encoding='utf-8') as f:
+                        for line in f:
+                            if "Patient Name:" in line:
+                                patient_name = line.split("Patient Name:")[1].strip()
+                            elif "Primary Concern:" in line:
+                                chief_complaint = line.split("Primary Concern:")[1].strip()
+                            elif "Chief Complaint:" in line:
+                                chief_complaint = line.split("Chief Complaint:")[1].strip()
+                    
+                    return {
+                        'file_name': filename,
+                        'phone_number': phone_number,
+                        'timestamp': timestamp,
+                        'patient_info': {
+                            'name': patient_name,
+                            'chief_complaint': chief_complaint
+                        },
+                        'duration': 0,
+                        'status': 'completed'
+                    }
+        except Exception as e:
+            print(f"Error processing TXT file {txt_file}: {e}")
+        return None
+    
+    def _store_note(self, path, key, note):
+        """Cache a freshly parsed note and move its analytics share over.
+
+        Entries are path -> ((mtime_ns, size), note, share). Caller holds
+        `_notes_lock`.
+        """
+        cached = self._notes_cache.pop(path, None)
+        if cached is not None:
+            self._count_share(cached[2], -1)
+        share = self._note_share(note)
+        self._notes_cache[path] = (key, note, share)
+        self._count_share(share, 1)
+    
+    @staticmethod
+    def _note_share(note):
+        """A note's analytics contribution, parsed once when it is cached.
+
+        Returns None for unparsed files, or (day, phone, reason, duration)
+        where day is None if the timestamp doesn't parse; such notes count
+        toward the total only.
+        """
+        if note is None:
+            return None
+        try:
+            note_date = datetime.fromisoformat(note.get('timestamp', '')).date()
+            reason = note.get('patient_info', {}).get('reason_for_visit')
+        except Exception:
+            return (None, None, None, 0)
+        return (note_date, note.get('phone_number'), reason, note.get('duration') or 0)
+    
+    def _count_share(self, share, sign):
+        """Add (sign=1) or remove (sign=-1) a note's share of the analytics.
+
+        Caller holds `_notes_lock`.
+        """
+        if share is None:
+            return
+        note_date, phone_number, reason, duration = share
+        stats = self._analytics
+        stats['total'] += sign
+        if note_date is None:
+            return
+        updates = [(stats['by_day'], note_date)]
+        if phone_number:
+            updates.append((stats['patients'], phone_number))
+        if reason:
+            updates.append((stats['reasons'], reason))
+        for counter, key in updates:
+            counter[key] += sign
+            if counter[key] <= 0:
+                del counter[key]
+        stats['total_duration'] += sign * duration
+    
     def get_call_notes(self):
         """Get call notes with enhanced processing.
 
         Collects both JSON no‑answer notes and generated TXT reports, normalizes
-        a few fields for display, and sorts newest first.
+        a few fields for display, and sorts newest first. Parsed files are
+        cached by mtime/size, so repeat requests only stat the directory.
+        The returned note dicts are shared with the cache; treat them as
+        read-only.
         """
         try:
-            import pathlib
-            
-            notes_dir = pathlib.Path(__file__).parent / "call_notes"
-            if not notes_dir.exists():
-                return []
-            
-            call_notes = []
-            
-            # Load JSON files (if any)
-            for json_file in notes_dir.glob("*.json"):
-                try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        note_data = json.load(f)
-                        note_data['file_name'] = json_file.name
-                        
-                        # Calculate call duration if available
-                        if 'start_time' in note_data and 'end_time' in note_data:
-                            try:
-                                start = datetime.fromisoformat(note_data['start_time'])
-                                end = datetime.fromisoformat(note_data['end_time'])
-                                note_data['duration'] = (end - start).total_seconds()
-                            except:
-                                note_data['duration'] = 0
-                        
-                        call_notes.append(note_data)
-                except Exception:
-                    continue
-            
-            # Load TXT medical reports
-            for txt_file in notes_dir.glob("*.txt"):
-                try:
-                    # Extract metadata from filename
-                    filename = txt_file.name
-                    if filename.startswith("medical_report_"):
-                        # Parse phone number and timestamp from filename
-                        parts = filename.replace("medical_report_", "").replace(".txt", "").split("_")
-                        if len(parts) >= 2:
-                            phone_number = parts[0]
-                            timestamp_str = "_".join(parts[1:])
-                            
-                            # Try to parse timestamp
-                            try:
-                                timestamp = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S").isoformat()
-                            except:
-                                timestamp = datetime.fromtimestamp(txt_file.stat().st_mtime).isoformat()
-                            
-                            # Read file content to extract patient info
-                            with open(txt_file, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                                
-                            # Extract patient name and chief complaint from content
-                            patient_name = "Unknown"
-                            chief_complaint = "Not specified"
-                            
-                            # Parse content for patient info
-                            lines = content.split('\n')
-                            for line in lines:
-                                if "Patient Name:" in line:
-                                    patient_name = line.split("Patient Name:")[1].strip()
-                                elif "Primary Concern:" in line:
-                                    chief_complaint = line.split("Primary Concern:")[1].strip()
-                                elif "Chief Complaint:" in line:
-                                    chief_complaint = line.split("Chief Complaint:")[1].strip()
-                            
-                            note_data = {
-                                'file_name': filename,
-                                'phone_number': phone_number,
-                                'timestamp': timestamp,
-                                'patient_info': {
-                                    'name': patient_name,
-                                    'chief_complaint': chief_complaint
-                                },
-                                'duration': 0,
-                                'status': 'completed'
-                            }
-                            
-                            call_notes.append(note_data)
-                except Exception as e:
-                    print(f"Error processing TXT file {txt_file}: {e}")
-                    continue
-            
+            call_notes = self._refresh_notes()
             # Sort by timestamp (newest first)
             call_notes.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
             return call_notes
@@ -402,56 +798,107 @@ class EnhancedCallManager:
         except Exception:
             return []
     
+    def _refresh_notes(self):
+        """Sync the note cache (and analytics counters) with call_notes/.
+
+        Returns the parsed notes, JSON notes before TXT reports, unsorted.
+        New or changed files are parsed concurrently on `_notes_pool`.
+        """
+        notes_dir = _NOTES_DIR
+        # One directory pass for JSON notes and TXT medical reports;
+        # scandir entries carry the stat the cache check needs
+        entries = []
+        if notes_dir.exists():
+            with os.scandir(notes_dir) as it:
+                for entry in it:
+                    name = entry.name
+                    if name.endswith('.json'):
+                        loader = self._load_json_note
+                    elif name.endswith('.txt'):
+                        loader = self._load_txt_report
+                    else:
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((entry, st, (st.st_mtime_ns, st.st_size), loader, name.endswith('.json')))
+        
+        with self._notes_lock:
+            stale = [
+                item for item in entries
+                if (self._notes_cache.get(item[0].path) or (None,))[0] != item[2]
+            ]
+        # Parse outside the lock so request threads only wait on their own files
+        parsed = dict(zip(
+            (item[0].path for item in stale),
+            self._notes_pool.map(lambda item: item[3](item[0], item[1]), stale),
+        ))
+        
+        json_notes = []
+        txt_notes = []
+        seen = set()
+        with self._notes_lock:
+            for entry, st, key, loader, is_json in entries:
+                path = entry.path
+                seen.add(path)
+                cached = self._notes_cache.get(path)
+                if cached is not None and cached[0] == key:
+                    note = cached[1]
+                elif path in parsed:
+                    note = parsed[path]
+                    self._store_note(path, key, note)
+                else:
+                    # Changed again since the stale check; picked up next time
+                    continue
+                if note is not None:
+                    (json_notes if is_json else txt_notes).append(note)
+            
+            # Forget files that were deleted
+            for path in [p for p in self._notes_cache if p not in seen]:
+                self._count_share(self._notes_cache.pop(path)[2], -1)
+        
+        # JSON notes first so equal timestamps keep their usual order
+        return json_notes + txt_notes
+    
     def get_analytics(self):
-        """Get call analytics and statistics (best‑effort)."""
+        """Get call analytics and statistics (best‑effort).
+
+        Memoized for `_analytics_ttl_s` so dashboard refreshes within that
+        window don't even stat the notes directory.
+        """
+        cached_at, cached = self._analytics_memo
+        now = time.monotonic()
+        if cached is not None and now - cached_at < self._analytics_ttl_s:
+            return cached
+        analytics = self._compute_analytics()
+        self._analytics_memo = (now, analytics)
+        return analytics
+    
+    def _compute_analytics(self):
+        """Analytics from the running totals.
+
+        Totals are kept up to date by `_count_share` as notes enter and leave
+        the cache, so only new or changed files cost anything here.
+        """
         try:
-            notes = self.get_call_notes()
-            
-            if not notes:
-                return {
-                    'total_calls': 0,
-                    'avg_duration': 0,
-                    'calls_today': 0,
-                    'calls_this_week': 0,
-                    'top_reasons': [],
-                    'patient_count': 0
-                }
+            self._refresh_notes()
             
-            total_calls = len(notes)
             today = datetime.now().date()
             week_ago = today - timedelta(days=7)
             
-            calls_today = 0
-            calls_this_week = 0
-            total_duration = 0
-            reasons = {}
-            patients = set()
-            
-            for note in notes:
-                try:
-                    note_date = datetime.fromisoformat(note.get('timestamp', '')).date()
-                    
-                    if note_date == today:
-                        calls_today += 1
-                    
-                    if note_date >= week_ago:
-                        calls_this_week += 1
-                    
-                    if note.get('phone_number'):
-                        patients.add(note['phone_number'])
-                    
-                    if note.get('patient_info', {}).get('reason_for_visit'):
-                        reason = note['patient_info']['reason_for_visit']
-                        reasons[reason] = reasons.get(reason, 0) + 1
-                    
-                    if note.get('duration'):
-                        total_duration += note['duration']
-                        
-                except:
-                    continue
+            with self._notes_lock:
+                stats = self._analytics
+                total_calls = stats['total']
+                calls_today = stats['by_day'].get(today, 0)
+                calls_this_week = sum(n for day, n in stats['by_day'].items() if day >= week_ago)
+                top_reasons = stats['reasons'].most_common(5)
+                patient_count = len(stats['patients'])
+                total_duration = stats['total_duration']
             
             avg_duration = total_duration / total_calls if total_calls > 0 else 0
-            top_reasons = sorted(reasons.items(), key=lambda x: x[1], reverse=True)[:5]
             
             return {
                 'total_calls': total_calls,
@@ -459,7 +906,7 @@ class EnhancedCallManager:
                 'calls_today': calls_today,
                 'calls_this_week': calls_this_week,
                 'top_reasons': top_reasons,
-                'patient_count': len(patients)
+                'patient_count': patient_count
             }
             
         except Exception:
@@ -473,8 +920,9 @@ class EnhancedCallManager:
             }
     
     def get_patient_database(self):
-        """Get patient database information"""
-        return self.patient_database
+        """Get patient database information (a snapshot, safe to serialize)"""
+        with self._state_lock:
+            return {phone: dict(record) for phone, record in self.patient_database.items()}
 
 # Initialize enhanced call manager
 call_manager = EnhancedCallManager()
@@ -495,6 +943,7 @@ def make_call():
         appointment_date = data.get('appointment_date', '')
         priority = data.get('priority', 'normal')
         doctor_note = data.get('doctor_note', '')
+        wait = bool(data.get('wait')) or request.args.get('wait') == '1'
         
         
         if not phone_number:
@@ -503,8 +952,13 @@ def make_call():
                 'error': 'Phone number is required'
             }), 400
         
-        result = call_manager.start_call(phone_number, patient_name, priority, doctor_note)
-        return jsonify(result)
+        if wait:
+            # Synchronous path for API callers that want the result inline
+            result = call_manager.start_call(phone_number, patient_name, priority, doctor_note)
+            return jsonify(result)
+        # Dispatch in the background; the UI polls /call_status/<call_id>
+        result = call_manager.start_call_async(phone_number, patient_name, priority, doctor_note)
+        return jsonify(result), 202
             
     except Exception as e:
         return jsonify({
@@ -513,13 +967,31 @@ def make_call():
         }), 500
 
 
+@app.route('/call_status/<call_id>')
+def get_call_status(call_id):
+    """Poll the dispatch started by /make_call"""
+    try:
+        result = call_manager.get_call_status(call_id)
+        if 'status' not in result:
+            return jsonify(result), 404
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 
 @app.route('/call_notes')
 def get_call_notes():
     """Get all call notes"""
     try:
         notes = call_manager.get_call_notes()
-        return jsonify(notes)
+        response = jsonify(notes)
+        # Always revalidate, but only resend the list when it changed
+        response.cache_control.no_cache = True
+        response.add_etag()
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify([]), 500
 
@@ -546,21 +1018,17 @@ def schedule_call():
                 'error': 'Phone number and scheduled time are required'
             }), 400
  
-        # Include the extra fields in schedule storage via kwargs
-        # We pass a dict so the manager can hold them until execution
-        result = call_manager.schedule_call(phone_number, scheduled_time, patient_name, priority)
-        # Augment the stored schedule with extra metadata if creation succeeded
-        if result.get('success'):
-            sid = result.get('schedule_id')
-            if sid in call_manager.scheduled_calls:
-                call_manager.scheduled_calls[sid].update({
-                    'template_id': template_id,
-                    'sms_reminder': sms_reminder,
-                    'retries': retries,
-                    'encounter_id': encounter_id,
-                    'instructions': instructions,
-                    'doctor_note': doctor_note,
-                })
+        # Include the extra fields in schedule storage via kwargs so the
+        # manager holds them from the moment the schedule can fire
+        result = call_manager.schedule_call(
+            phone_number, scheduled_time, patient_name, priority,
+            template_id=template_id,
+            sms_reminder=sms_reminder,
+            retries=retries,
+            encounter_id=encounter_id,
+            instructions=instructions,
+            doctor_note=doctor_note,
+        )
         return jsonify(result)
              
     except Exception as e:
@@ -595,7 +1063,13 @@ def get_analytics():
     """Get call analytics"""
     try:
         analytics = call_manager.get_analytics()
-        return jsonify(analytics)
+        response = jsonify(analytics)
+        # Browsers revalidate with If-None-Match and get an empty 304
+        # while the numbers are unchanged; max-age matches the server memo
+        response.cache_control.private = True
+        response.cache_control.max_age = int(call_manager._analytics_ttl_s)
+        response.add_etag()
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({}), 500
 
@@ -604,7 +1078,10 @@ def get_patients():
     """Get patient database"""
     try:
         patients = call_manager.get_patient_database()
-        return jsonify(patients)
+        response = jsonify(patients)
+        response.cache_control.no_cache = True
+        response.add_etag()
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({}), 500
 
@@ -613,9 +1090,7 @@ def get_patients():
 def view_note(filename):
     """View a specific call note"""
     try:
-        import pathlib
-        
-        notes_dir = pathlib.Path(__file__).parent / "call_notes"
+        notes_dir = _NOTES_DIR
         file_path = notes_dir / filename
         
         if not file_path.exists():
@@ -625,8 +1100,8 @@ def view_note(filename):
             }), 404
         # If JSON file, parse and return
         if file_path.suffix.lower() == '.json':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                note_data = json.load(f)
+            with open(file_path, 'rb') as f:
+                note_data = _json_loads(f.read())
             return jsonify({
                 'success': True,
                 'note': note_data
@@ -670,20 +1145,22 @@ def view_note(filename):
 @app.route('/reports')
 def list_reports():
     try:
-        import pathlib
-        from datetime import datetime
-
-        notes_dir = pathlib.Path(__file__).parent / "call_notes"
+        notes_dir = _NOTES_DIR
         if not notes_dir.exists():
             return jsonify([])
 
         reports = []
-        for txt_file in notes_dir.glob("*.txt"):
+        with os.scandir(notes_dir) as it:
+            txt_entries = [entry for entry in it if entry.name.endswith('.txt')]
+        for txt_file in txt_entries:
             try:
+                if not txt_file.is_file():
+                    continue
                 filename = txt_file.name
+                st = txt_file.stat()
                 # Try to extract phone and timestamp from the filename pattern
                 phone_number = ""
-                timestamp = datetime.fromtimestamp(txt_file.stat().st_mtime).isoformat()
+                timestamp = datetime.fromtimestamp(st.st_mtime).isoformat()
                 if filename.startswith("medical_report_") and filename.endswith(".txt"):
                     parts = filename.replace("medical_report_", "").replace(".txt", "").split("_")
                     if len(parts) >= 2:
@@ -697,7 +1174,7 @@ def list_reports():
                     'file_name': filename,
                     'phone_number': phone_number,
                     'timestamp': timestamp,
-                    'size': txt_file.stat().st_size,
+                    'size': st.st_size,
                 })
             except Exception:
                 continue
@@ -712,14 +1189,13 @@ def list_reports():
 @app.route('/report/<path:filename>')
 def get_report(filename):
     try:
-        import pathlib
         # basic validation to prevent path traversal
         if (".." in filename) or ("/" in filename) or ("\\" in filename):
             return jsonify({'success': False, 'error': 'Invalid filename'}), 400
         if not filename.endswith('.txt'):
             return jsonify({'success': False, 'error': 'Unsupported file type'}), 400
 
-        notes_dir = pathlib.Path(__file__).parent / "call_notes"
+        notes_dir = _NOTES_DIR
         file_path = notes_dir / filename
         if not file_path.exists():
             return jsonify({'success': False, 'error': 'Report not found'}), 404
@@ -731,7 +1207,26 @@ def get_report(filename):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# Raw TXT report, streamed from disk with Range/If-Modified-Since support
+@app.route('/report_raw/<path:filename>')
+def get_report_raw(filename):
+    try:
+        if not filename.endswith('.txt'):
+            return jsonify({'success': False, 'error': 'Unsupported file type'}), 400
+
+        notes_dir = _NOTES_DIR
+        file_path = (notes_dir / filename).resolve()
+        if file_path.parent != notes_dir:
+            return jsonify({'success': False, 'error': 'Invalid filename'}), 400
+        if not file_path.is_file():
+            return jsonify({'success': False, 'error': 'Report not found'}), 404
+
+        return send_file(file_path, mimetype='text/plain', conditional=True)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 if __name__ == '__main__':
     print("🚀 Starting Enhanced Outbound Caller Web UI...")
     print("Make sure your agent is running with: python agent.py dev")
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Dev server only; see README for running under gunicorn
+    app.run(debug=os.getenv('FLASK_DEBUG') == '1', host='0.0.0.0', port=5000)